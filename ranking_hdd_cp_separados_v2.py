@@ -6,7 +6,15 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import logging
-import ast
+from collections import defaultdict
+
+# Rutas de los componentes CP y HDD (se agregan una sola vez)
+for _ruta in ('cp_data_analysis_v2/src', 'hdd_data_analysis_v2/src'):
+    if _ruta not in sys.path:
+        sys.path.append(_ruta)
+
+from cp_upload_data_deploy import upload_data_sql as cp_upload_data_sql
+from hdd_upload_data_deploy import upload_data_sql as hdd_upload_data_sql
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -34,6 +42,10 @@ def calculate_percentile_score(value, all_values, direction='lower_better'):
     if len(valid_values) == 0:
         return 0.0
     
+    # Con un único valor no hay con qué comparar
+    if len(valid_values) == 1:
+        return 100.0 if direction == 'lower_better' else 0.0
+    
     percentile = (sum(1 for x in valid_values if x < value) / len(valid_values)) * 100
     
     if direction == 'lower_better':
@@ -41,99 +53,163 @@ def calculate_percentile_score(value, all_values, direction='lower_better'):
     
     return percentile
 
-def generate_area_explanation(equipo, area, valor, all_values, area_nombre, metric_type):
-    """Genera explicación específica por área y tipo de métrica"""
-    score = calculate_percentile_score(valor, all_values, 'lower_better')
+# Plantillas de explicación por tipo de métrica y severidad
+PLANTILLAS_AREA = {
+    'llenado': {
+        'excelente': "**{area_nombre} Excelente ({score:.1f}pts)**: El equipo mantiene una carga baja de {valor:.1f} en {area}, lo que indica un rendimiento excepcional.",
+        'buena': "**{area_nombre} Buena ({score:.1f}pts)**: Con una carga de {valor:.1f} en {area}, el equipo tiene un rendimiento aceptable.",
+        'regular': "**{area_nombre} Regular ({score:.1f}pts)**: La carga de {valor:.1f} en {area} sugiere que el equipo podría estar experimentando problemas de rendimiento.",
+        'critica': "**{area_nombre} Crítica ({score:.1f}pts)**: Con una carga alta de {valor:.1f} en {area}, el equipo está experimentando problemas significativos de rendimiento."
+    },
+    'inestabilidad': {
+        'excelente': "**Estabilidad en {area_nombre} Excelente ({score:.1f}pts)**: El equipo muestra una variabilidad muy baja ({valor:.1f}), indicando un funcionamiento muy estable.",
+        'buena': "**Estabilidad en {area_nombre} Buena ({score:.1f}pts)**: La variabilidad de {valor:.1f} indica un funcionamiento estable con algunas fluctuaciones menores.",
+        'regular': "**Estabilidad en {area_nombre} Regular ({score:.1f}pts)**: La variabilidad de {valor:.1f} sugiere inestabilidad que puede afectar el rendimiento.",
+        'critica': "**Estabilidad en {area_nombre} Crítica ({score:.1f}pts)**: La alta variabilidad de {valor:.1f} indica problemas graves de estabilidad."
+    },
+    'tasa_cambio': {
+        'excelente': "**Cambios en {area_nombre} Predecibles ({score:.1f}pts)**: Los cambios en {area} son muy predecibles ({valor:.1f}), indicando un funcionamiento estable.",
+        'buena': "**Cambios en {area_nombre} Estables ({score:.1f}pts)**: Los cambios en {area} son relativamente estables ({valor:.1f}).",
+        'regular': "**Cambios en {area_nombre} Variables ({score:.1f}pts)**: Los cambios en {area} son impredecibles ({valor:.1f}), lo que puede afectar el rendimiento.",
+        'critica': "**Cambios en {area_nombre} Caóticos ({score:.1f}pts)**: Los cambios en {area} son muy impredecibles ({valor:.1f}), requiriendo atención inmediata."
+    }
+}
+
+def _normalizar_areas(areas_equipo):
+    """Devuelve areas_cp como lista (get_cp_metrics ya la genera como lista)"""
+    return areas_equipo if isinstance(areas_equipo, list) else [areas_equipo]
+
+def generate_cp_area_explanations(df_cp):
+    """
+    Genera las explicaciones por área de todos los equipos CP en una sola pasada.
+
+    Usa las columnas de puntuación ya calculadas en df_cp en lugar de recalcular
+    el percentil por cada equipo, área y métrica.
+
+    Returns:
+        tuple: (Serie de explicaciones, dict índice -> lista de (área, severidad))
+    """
+    # Las métricas con uno o ningún valor válido no discriminan entre equipos
+    metricas = [
+        metric_type for metric_type in ('llenado', 'inestabilidad', 'tasa_cambio')
+        if df_cp[f'cp_{metric_type}'].notna().sum() > 1
+    ]
+    if not metricas:
+        return pd.Series('', index=df_cp.index, dtype=object), {}
+    
+    explode = df_cp.assign(area=df_cp['areas_cp'].map(_normalizar_areas)).explode('area')
+    explode = explode[explode['area'].isin(list(AREAS_CP_SIGNIFICADO))]
+    areas = explode['area'].tolist()
+    areas_nombre = explode['area'].map(AREAS_CP_SIGNIFICADO).tolist()
     
-    if metric_type == 'llenado':
-        if score >= 80:
-            return f"**{area_nombre} Excelente ({score:.1f}pts)**: El equipo mantiene una carga baja de {valor:.1f} en {area}, lo que indica un rendimiento excepcional."
-        elif score >= 60:
-            return f"**{area_nombre} Buena ({score:.1f}pts)**: Con una carga de {valor:.1f} en {area}, el equipo tiene un rendimiento aceptable."
-        elif score >= 40:
-            return f"**{area_nombre} Regular ({score:.1f}pts)**: La carga de {valor:.1f} en {area} sugiere que el equipo podría estar experimentando problemas de rendimiento."
-        else:
-            return f"**{area_nombre} Crítica ({score:.1f}pts)**: Con una carga alta de {valor:.1f} en {area}, el equipo está experimentando problemas significativos de rendimiento."
+    textos_por_metrica = []
+    severidades_por_metrica = []
+    for metric_type in metricas:
+        scores = explode[f'cp_{metric_type}_score'].to_numpy(dtype=float)
+        severidades = np.select(
+            [scores >= 80, scores >= 60, scores >= 40],
+            ['excelente', 'buena', 'regular'],
+            default='critica'
+        ).tolist()
+        plantillas = PLANTILLAS_AREA[metric_type]
+        textos_por_metrica.append([
+            plantillas[sev].format(area_nombre=nombre, score=score, valor=valor, area=area)
+            for sev, nombre, score, valor, area in zip(
+                severidades, areas_nombre, scores, explode[f'cp_{metric_type}'], areas
+            )
+        ])
+        severidades_por_metrica.append(severidades)
     
-    elif metric_type == 'inestabilidad':
-        if score >= 80:
-            return f"**Estabilidad en {area_nombre} Excelente ({score:.1f}pts)**: El equipo muestra una variabilidad muy baja ({valor:.1f}), indicando un funcionamiento muy estable."
-        elif score >= 60:
-            return f"**Estabilidad en {area_nombre} Buena ({score:.1f}pts)**: La variabilidad de {valor:.1f} indica un funcionamiento estable con algunas fluctuaciones menores."
-        elif score >= 40:
-            return f"**Estabilidad en {area_nombre} Regular ({score:.1f}pts)**: La variabilidad de {valor:.1f} sugiere inestabilidad que puede afectar el rendimiento."
-        else:
-            return f"**Estabilidad en {area_nombre} Crítica ({score:.1f}pts)**: La alta variabilidad de {valor:.1f} indica problemas graves de estabilidad."
+    # Una fila por (equipo, área) con las explicaciones de cada métrica
+    textos_fila = [' | '.join(textos) for textos in zip(*textos_por_metrica)]
+    explicaciones = (
+        pd.Series(textos_fila, index=explode.index, dtype=object)
+        .groupby(level=0, sort=False)
+        .agg(' | '.join)
+        .reindex(df_cp.index, fill_value='')
+    )
     
-    elif metric_type == 'tasa_cambio':
-        if score >= 80:
-            return f"**Cambios en {area_nombre} Predecibles ({score:.1f}pts)**: Los cambios en {area} son muy predecibles ({valor:.1f}), indicando un funcionamiento estable."
-        elif score >= 60:
-            return f"**Cambios en {area_nombre} Estables ({score:.1f}pts)**: Los cambios en {area} son relativamente estables ({valor:.1f})."
-        elif score >= 40:
-            return f"**Cambios en {area_nombre} Variables ({score:.1f}pts)**: Los cambios en {area} son impredecibles ({valor:.1f}), lo que puede afectar el rendimiento."
-        else:
-            return f"**Cambios en {area_nombre} Caóticos ({score:.1f}pts)**: Los cambios en {area} son muy impredecibles ({valor:.1f}), requiriendo atención inmediata."
+    estructura = defaultdict(list)
+    for idx, area, *severidades in zip(explode.index, areas, *severidades_por_metrica):
+        estructura[idx].extend((area, severidad) for severidad in severidades)
+    
+    return explicaciones, estructura
+
+# Textos fijos de recomendaciones
+REC_INTERVENCION = "Intervención inmediata requerida en "
+REC_OPTIMIZAR = "Optimizar rendimiento en "
+REC_MULTIPLES_AREAS = "múltiples áreas: "
+REC_MANTENER = "Mantener estándares actuales de rendimiento"
+REC_REVISION = "Revisión completa del equipo requerida"
 
-def generate_recommendations(equipo, explicaciones_por_area):
-    """Genera recomendaciones basadas en las explicaciones por área"""
+def _describir_areas(areas):
+    """Describe un conjunto de nombres de área (hasta 3, en orden alfabético)"""
+    top3 = sorted(areas)[:3]
+    if len(areas) == 1:
+        return top3[0]
+    return REC_MULTIPLES_AREAS + ', '.join(top3)
+
+def generate_recommendations(equipo, estructura_por_area):
+    """
+    Genera recomendaciones basadas en la severidad por área.
+
+    Args:
+        equipo: Nombre del equipo
+        estructura_por_area: Lista de tuplas (código de área, severidad)
+    """
     recomendaciones = []
     
-    # Analizar explicaciones por área
-    areas_criticas = []
-    areas_regulares = []
+    # Agrupar nombres de área por severidad (el set elimina duplicados)
+    areas_por_severidad = defaultdict(set)
+    significado = AREAS_CP_SIGNIFICADO.get
+    for area, severidad in estructura_por_area:
+        area_nombre = significado(area)
+        if area_nombre is not None:
+            areas_por_severidad[severidad].add(area_nombre)
     
-    for explicacion in explicaciones_por_area:
-        if "Crítica" in explicacion:
-            # Extraer el nombre del área
-            if "en " in explicacion:
-                area_part = explicacion.split("en ")[1].split(" ")[0]
-                if area_part in AREAS_CP_SIGNIFICADO:
-                    areas_criticas.append(AREAS_CP_SIGNIFICADO[area_part])
-        elif "Regular" in explicacion:
-            if "en " in explicacion:
-                area_part = explicacion.split("en ")[1].split(" ")[0]
-                if area_part in AREAS_CP_SIGNIFICADO:
-                    areas_regulares.append(AREAS_CP_SIGNIFICADO[area_part])
+    areas_criticas = areas_por_severidad['critica']
+    areas_regulares = areas_por_severidad['regular']
     
     # Generar recomendaciones específicas
     if areas_criticas:
-        areas_unicas = list(set(areas_criticas))
-        if len(areas_unicas) == 1:
-            recomendaciones.append(f"Intervención inmediata requerida en {areas_unicas[0]}")
-        else:
-            recomendaciones.append(f"Intervención inmediata requerida en múltiples áreas: {', '.join(areas_unicas[:3])}")
+        recomendaciones.append(REC_INTERVENCION + _describir_areas(areas_criticas))
     
     if areas_regulares:
-        areas_unicas = list(set(areas_regulares))
-        if len(areas_unicas) == 1:
-            recomendaciones.append(f"Optimizar rendimiento en {areas_unicas[0]}")
-        else:
-            recomendaciones.append(f"Optimizar rendimiento en múltiples áreas: {', '.join(areas_unicas[:3])}")
+        recomendaciones.append(REC_OPTIMIZAR + _describir_areas(areas_regulares))
     
     # Recomendaciones generales
     if not areas_criticas and not areas_regulares:
-        recomendaciones.append("Mantener estándares actuales de rendimiento")
+        recomendaciones.append(REC_MANTENER)
     elif len(areas_criticas) > 3:
-        recomendaciones.append("Revisión completa del equipo requerida")
+        recomendaciones.append(REC_REVISION)
     
     return '; '.join(recomendaciones)
 
-# --- Cargar y procesar datos CP ---
-def get_cp_metrics():
-    sys.path.append('cp_data_analysis_v2/src')
-    from cp_upload_data_deploy import upload_data_sql
-    logger.info('Cargando datos CP...')
-    cp_data = upload_data_sql()
+# --- Cargar y procesar datos CP / HDD ---
+def _get_metrics(cargar_datos, prefijo, value_col, extra_col, extra_out, nivel, escala):
+    """
+    Calcula las métricas promedio por equipo para una fuente de datos.
+
+    Args:
+        cargar_datos: Función que devuelve el dict de DataFrames de la fuente
+        prefijo: Prefijo de las columnas de salida ('cp' o 'hdd')
+        value_col: Columna con el valor medido ('valor' o 'uso')
+        extra_col: Columna adicional a acumular por equipo ('area' o 'unidad')
+        extra_out: Nombre de la columna de salida para extra_col
+        nivel: Nombre de la métrica de nivel ('llenado' o 'uso')
+        escala: Factor aplicado a la media del valor
+    """
+    logger.info(f'Cargando datos {prefijo.upper()}...')
+    data = cargar_datos()
     equipos = {}
     
-    for nombre_df, df in cp_data.items():
-        if df.empty or not set(['equipo','fecha','valor','area']).issubset(df.columns):
+    for nombre_df, df in data.items():
+        if df.empty or not set(['equipo','fecha',value_col,extra_col]).issubset(df.columns):
             continue
         df = df.copy()
         df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
-        df['valor'] = pd.to_numeric(df['valor'], errors='coerce')
-        df = df.dropna(subset=['fecha','valor'])
+        df[value_col] = pd.to_numeric(df[value_col], errors='coerce')
+        df = df.dropna(subset=['fecha',value_col])
         if df.empty:
             continue
         fecha_max = df['fecha'].max()
@@ -145,20 +221,20 @@ def get_cp_metrics():
             if len(df_eq) < 3:
                 continue
             if equipo not in equipos:
-                equipos[equipo] = {'llenado':[],'inestabilidad':[],'tasa_cambio':[],'areas':set(),'registros':0}
-            valores = df_eq['valor'].tolist()
-            equipos[equipo]['llenado'].append(np.mean(valores))
+                equipos[equipo] = {'nivel':[],'inestabilidad':[],'tasa_cambio':[],'extra':set(),'registros':0}
+            valores = df_eq[value_col].tolist()
+            equipos[equipo]['nivel'].append(np.mean(valores)*escala)
             equipos[equipo]['inestabilidad'].append(np.std(valores)*1000)
             # Tasa de cambio
             df_eq_sorted = df_eq.sort_values('fecha')
             tasas = []
             for i in range(1,len(df_eq_sorted)):
-                v0 = df_eq_sorted.iloc[i-1]['valor']
-                v1 = df_eq_sorted.iloc[i]['valor']
+                v0 = df_eq_sorted.iloc[i-1][value_col]
+                v1 = df_eq_sorted.iloc[i][value_col]
                 if v0 != 0:
                     tasas.append(((v1-v0)/v0)*100)
             equipos[equipo]['tasa_cambio'].append(np.std(tasas)*10000 if tasas else 0)
-            equipos[equipo]['areas'].add(df_eq['area'].iloc[0])
+            equipos[equipo]['extra'].add(df_eq[extra_col].iloc[0])
             equipos[equipo]['registros'] += len(df_eq)
     
     # Consolidar métricas promedio por equipo
@@ -166,68 +242,19 @@ def get_cp_metrics():
     for eq, vals in equipos.items():
         rows.append({
             'equipo': eq,
-            'cp_llenado': np.mean(vals['llenado']) if vals['llenado'] else np.nan,
-            'cp_inestabilidad': np.mean(vals['inestabilidad']) if vals['inestabilidad'] else np.nan,
-            'cp_tasa_cambio': np.mean(vals['tasa_cambio']) if vals['tasa_cambio'] else np.nan,
-            'areas_cp': list(vals['areas']),
-            'registros_cp': vals['registros']
+            f'{prefijo}_{nivel}': np.mean(vals['nivel']) if vals['nivel'] else np.nan,
+            f'{prefijo}_inestabilidad': np.mean(vals['inestabilidad']) if vals['inestabilidad'] else np.nan,
+            f'{prefijo}_tasa_cambio': np.mean(vals['tasa_cambio']) if vals['tasa_cambio'] else np.nan,
+            extra_out: list(vals['extra']),
+            f'registros_{prefijo}': vals['registros']
         })
     return pd.DataFrame(rows)
 
-# --- Cargar y procesar datos HDD ---
+def get_cp_metrics():
+    return _get_metrics(cp_upload_data_sql, 'cp', 'valor', 'area', 'areas_cp', 'llenado', 1)
+
 def get_hdd_metrics():
-    sys.path.append('hdd_data_analysis_v2/src')
-    from hdd_upload_data_deploy import upload_data_sql
-    logger.info('Cargando datos HDD...')
-    hdd_data = upload_data_sql()
-    equipos = {}
-    
-    for nombre_df, df in hdd_data.items():
-        if df.empty or not set(['equipo','fecha','uso','unidad']).issubset(df.columns):
-            continue
-        df = df.copy()
-        df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
-        df['uso'] = pd.to_numeric(df['uso'], errors='coerce')
-        df = df.dropna(subset=['fecha','uso'])
-        if df.empty:
-            continue
-        fecha_max = df['fecha'].max()
-        df = df[df['fecha'] >= fecha_max - timedelta(days=7)]
-        if df.empty:
-            continue
-        for equipo in df['equipo'].unique():
-            df_eq = df[df['equipo']==equipo]
-            if len(df_eq) < 3:
-                continue
-            if equipo not in equipos:
-                equipos[equipo] = {'uso':[],'inestabilidad':[],'tasa_cambio':[],'unidades':set(),'registros':0}
-            valores = df_eq['uso'].tolist()
-            equipos[equipo]['uso'].append(np.mean(valores)*100)
-            equipos[equipo]['inestabilidad'].append(np.std(valores)*1000)
-            # Tasa de cambio
-            df_eq_sorted = df_eq.sort_values('fecha')
-            tasas = []
-            for i in range(1,len(df_eq_sorted)):
-                v0 = df_eq_sorted.iloc[i-1]['uso']
-                v1 = df_eq_sorted.iloc[i]['uso']
-                if v0 != 0:
-                    tasas.append(((v1-v0)/v0)*100)
-            equipos[equipo]['tasa_cambio'].append(np.std(tasas)*10000 if tasas else 0)
-            equipos[equipo]['unidades'].add(df_eq['unidad'].iloc[0])
-            equipos[equipo]['registros'] += len(df_eq)
-    
-    # Consolidar métricas promedio por equipo
-    rows = []
-    for eq, vals in equipos.items():
-        rows.append({
-            'equipo': eq,
-            'hdd_uso': np.mean(vals['uso']) if vals['uso'] else np.nan,
-            'hdd_inestabilidad': np.mean(vals['inestabilidad']) if vals['inestabilidad'] else np.nan,
-            'hdd_tasa_cambio': np.mean(vals['tasa_cambio']) if vals['tasa_cambio'] else np.nan,
-            'unidades_hdd': list(vals['unidades']),
-            'registros_hdd': vals['registros']
-        })
-    return pd.DataFrame(rows)
+    return _get_metrics(hdd_upload_data_sql, 'hdd', 'uso', 'unidad', 'unidades_hdd', 'uso', 100)
 
 def generate_rankings_with_area_explanations():
     """Genera rankings con explicaciones por área"""
@@ -264,55 +291,11 @@ def generate_rankings_with_area_explanations():
         )
         
         # Generar explicaciones por área
-        explicaciones_cp = []
-        recomendaciones_cp = []
-        
-        for idx, row in df_cp.iterrows():
-            equipo_explicaciones = []
-            
-            # Obtener áreas del equipo
-            areas_equipo = row['areas_cp']
-            if isinstance(areas_equipo, str):
-                try:
-                    areas_list = ast.literal_eval(areas_equipo)
-                    if not isinstance(areas_list, list):
-                        areas_list = [areas_list]
-                except:
-                    areas_list = [areas_equipo]
-            else:
-                areas_list = areas_equipo if isinstance(areas_equipo, list) else [areas_equipo]
-            
-            # Generar explicaciones para cada área
-            for area in areas_list:
-                if area in AREAS_CP_SIGNIFICADO:
-                    area_nombre = AREAS_CP_SIGNIFICADO[area]
-                    
-                    # Explicación de llenado
-                    explicacion_llenado = generate_area_explanation(
-                        row['equipo'], area, row['cp_llenado'], 
-                        df_cp['cp_llenado'].dropna(), area_nombre, 'llenado'
-                    )
-                    equipo_explicaciones.append(explicacion_llenado)
-                    
-                    # Explicación de inestabilidad
-                    explicacion_inestabilidad = generate_area_explanation(
-                        row['equipo'], area, row['cp_inestabilidad'],
-                        df_cp['cp_inestabilidad'].dropna(), area_nombre, 'inestabilidad'
-                    )
-                    equipo_explicaciones.append(explicacion_inestabilidad)
-                    
-                    # Explicación de tasa de cambio
-                    explicacion_tasa_cambio = generate_area_explanation(
-                        row['equipo'], area, row['cp_tasa_cambio'],
-                        df_cp['cp_tasa_cambio'].dropna(), area_nombre, 'tasa_cambio'
-                    )
-                    equipo_explicaciones.append(explicacion_tasa_cambio)
-            
-            explicaciones_cp.append(' | '.join(equipo_explicaciones))
-            
-            # Generar recomendaciones
-            recomendacion = generate_recommendations(row['equipo'], equipo_explicaciones)
-            recomendaciones_cp.append(recomendacion)
+        explicaciones_cp, estructura_cp = generate_cp_area_explanations(df_cp)
+        recomendaciones_cp = [
+            generate_recommendations(equipo, estructura_cp.get(idx, []))
+            for idx, equipo in zip(df_cp.index, df_cp['equipo'])
+        ]
         
         df_cp['explicacion'] = explicaciones_cp
         df_cp['recomendaciones'] = recomendaciones_cp
@@ -399,8 +382,8 @@ def generate_rankings_with_area_explanations():
             
             explicaciones_hdd.append(' | '.join(equipo_explicaciones))
             
-            # Generar recomendaciones HDD
-            recomendacion = generate_recommendations(row['equipo'], equipo_explicaciones)
+            # Generar recomendaciones HDD (sin áreas CP asociadas)
+            recomendacion = generate_recommendations(row['equipo'], [])
             recomendaciones_hdd.append(recomendacion)
         
         df_hdd['explicacion'] = explicaciones_hdd
@@ -6,100 +6,347 @@ Script para mostrar y analizar los resultados del sistema de puntuación unifica
 """
 
 import pandas as pd
+import numpy as np
 import logging
-from datetime import datetime
+import sys
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def get_latest_results():
+# Columnas de puntuación individual y su etiqueta para mostrar
+COLUMNAS_PUNTUACION = (
+    ('cp_llenado_score', 'CP Llenado'),
+    ('cp_inestabilidad_score', 'CP Estabilidad'),
+    ('cp_tasa_cambio_score', 'CP Cambios'),
+    ('hdd_uso_score', 'HDD Uso'),
+    ('hdd_inestabilidad_score', 'HDD Estabilidad'),
+    ('hdd_tasa_cambio_score', 'HDD Cambios'),
+)
+
+# Columnas disponibles en nv_unified_scoring (lista blanca para el SELECT)
+COLUMNAS_RESULTADOS = (
+    'equipo', 'area_cp', 'unidades_hdd', 'puntuacion_final', 'posicion_ranking',
+    'categoria_final', 'cp_llenado', 'cp_llenado_score', 'cp_inestabilidad', 'cp_inestabilidad_score',
+    'cp_tasa_cambio', 'cp_tasa_cambio_score', 'hdd_uso', 'hdd_uso_score', 'hdd_inestabilidad',
+    'hdd_inestabilidad_score', 'hdd_tasa_cambio', 'hdd_tasa_cambio_score',
+    'explicacion_detallada', 'recomendaciones', 'registros_cp', 'registros_hdd', 'fecha_ejecucion',
+)
+
+# Columnas de la carga general: todas salvo la explicación detallada, que se pide por equipo
+COLUMNAS_CARGA = tuple(c for c in COLUMNAS_RESULTADOS if c != 'explicacion_detallada')
+
+# Columnas usadas por los listados de mejores/peores equipos (sin la explicación detallada)
+COLUMNAS_LISTADO = (
+    'equipo', 'area_cp', 'unidades_hdd', 'puntuacion_final', 'posicion_ranking', 'categoria_final',
+    'cp_llenado_score', 'cp_inestabilidad_score', 'cp_tasa_cambio_score',
+    'hdd_uso_score', 'hdd_inestabilidad_score', 'hdd_tasa_cambio_score', 'recomendaciones',
+)
+
+# Puntuaciones DECIMAL(5,2): caben sin pérdida en float32
+COLUMNAS_FLOAT32 = ('puntuacion_final',) + tuple(columna for columna, _ in COLUMNAS_PUNTUACION)
+# Métricas DECIMAL(10,4) (p. ej. tasas de cambio ~1e6): se mantienen en float64
+COLUMNAS_METRICAS = (
+    'cp_llenado', 'cp_inestabilidad', 'cp_tasa_cambio', 'hdd_uso', 'hdd_inestabilidad', 'hdd_tasa_cambio',
+)
+COLUMNAS_ENTERAS = ('posicion_ranking', 'registros_cp', 'registros_hdd')
+
+# Máximo de equipos por carga de resultados
+MAX_RESULTADOS = 1000
+
+def _valor_o_na(valor):
+    """
+    Valor para mostrar, o 'N/A' si es nulo (None/NaN, p. ej. área de un equipo solo HDD) o vacío.
+    
+    Args:
+        valor: Valor de la celda
+    
+    Returns:
+        Valor original o 'N/A'
+    """
+    return 'N/A' if pd.isna(valor) or valor == '' else valor
+
+def _get_db_manager():
+    """
+    Obtiene el gestor de base de datos de los componentes CP.
+    
+    Returns:
+        DatabaseManager: Gestor de base de datos CP
+    """
+    if 'cp_data_analysis_v2/src' not in sys.path:
+        sys.path.append('cp_data_analysis_v2/src')
+    from cp_db_manager import get_db_manager
+    
+    return get_db_manager()
+
+def _read_query(query, params=None, chunksize=500):
+    """
+    Ejecuta una consulta y construye el DataFrame leyendo el resultado por bloques.
+    
+    Evita materializar la lista intermedia de diccionarios que devuelve
+    execute_query antes de crear el DataFrame.
+    
+    Args:
+        query: Consulta SQL (parámetros con formato :nombre)
+        params: Parámetros de la consulta (opcional)
+        chunksize: Número de filas leídas por bloque
+    
+    Returns:
+        pd.DataFrame: Resultado de la consulta (vacío si no hay conexión o filas)
+    """
+    from sqlalchemy.sql import text
+    
+    db_manager = _get_db_manager()
+    if not db_manager.is_connected or not db_manager.engine:
+        logger.warning("No hay conexión a la base de datos")
+        return pd.DataFrame()
+    
+    with db_manager.engine.connect() as connection:
+        bloques = list(pd.read_sql_query(text(query), connection, params=params, chunksize=chunksize))
+    
+    if not bloques:
+        return pd.DataFrame()
+    return pd.concat(bloques, ignore_index=True)
+
+def _get_max_fecha():
+    """
+    Obtiene la fecha de la ejecución más reciente del sistema unificado.
+    
+    Returns:
+        Fecha de ejecución más reciente o None si la tabla está vacía
+    """
+    df = _read_query("SELECT MAX(fecha_ejecucion) AS fecha_ejecucion FROM nv_unified_scoring")
+    if df.empty or pd.isna(df['fecha_ejecucion'].iloc[0]):
+        return None
+    return df['fecha_ejecucion'].iloc[0]
+
+@lru_cache(maxsize=4)
+def _load_for_fecha(fecha, top_n=MAX_RESULTADOS, desde_el_final=False, columns=COLUMNAS_RESULTADOS):
+    """
+    Carga (y memoiza) los resultados de una ejecución concreta.
+    
+    Args:
+        fecha: Fecha de ejecución a cargar
+        top_n: Número máximo de equipos a obtener
+        desde_el_final: Si True, obtiene los equipos con peor posición en el ranking
+        columns: Tupla de columnas a seleccionar (subconjunto de COLUMNAS_RESULTADOS)
+    
+    Returns:
+        pd.DataFrame: DataFrame con los resultados, ordenado por posición
+    """
+    desconocidas = [c for c in columns if c not in COLUMNAS_RESULTADOS]
+    if desconocidas:
+        raise ValueError(f"Columnas no válidas: {', '.join(desconocidas)}")
+    
+    # El límite y el orden se resuelven en SQL Server
+    orden = "DESC" if desde_el_final else "ASC"
+    query = f"""
+    SELECT TOP (:top_n)
+        {', '.join(columns)}
+    FROM nv_unified_scoring 
+    WHERE fecha_ejecucion = :fecha
+    ORDER BY posicion_ranking {orden}
+    """
+    
+    df = _read_query(query, {'top_n': top_n, 'fecha': fecha})
+    
+    if df.empty:
+        return df
+    
+    if desde_el_final:
+        df = df.iloc[::-1].reset_index(drop=True)
+    
+    # Columnas de baja cardinalidad como categóricas (groupby/crosstab sobre códigos enteros)
+    for columna in ('area_cp', 'categoria_final'):
+        if columna in df.columns:
+            df[columna] = df[columna].astype('category')
+    
+    # Reducir puntuaciones a float32 y contadores a enteros pequeños (mitad de memoria en agregaciones)
+    for columna in COLUMNAS_FLOAT32:
+        if columna in df.columns:
+            df[columna] = pd.to_numeric(df[columna], errors='coerce', downcast='float')
+    for columna in COLUMNAS_METRICAS:
+        if columna in df.columns:
+            df[columna] = pd.to_numeric(df[columna], errors='coerce').astype('float64')
+    for columna in COLUMNAS_ENTERAS:
+        if columna in df.columns:
+            df[columna] = pd.to_numeric(df[columna], errors='coerce', downcast='integer')
+    
+    # Número de unidades HDD calculado una sola vez (evita split por fila al imprimir)
+    if 'unidades_hdd' in df.columns:
+        sin_unidades = df['unidades_hdd'].isna() | (df['unidades_hdd'] == '')
+        df['n_hdd'] = np.where(sin_unidades, 0, df['unidades_hdd'].str.count(',').fillna(0).astype(int) + 1)
+    return df
+
+def get_latest_results(top_n=None, desde_el_final=False, columns=None, fecha=None):
     """
     Obtiene los resultados más recientes del sistema de puntuación unificado.
     
+    Los resultados se memoizan por fecha de ejecución, de modo que llamadas
+    repetidas solo consultan MAX(fecha_ejecucion) mientras no haya una ejecución nueva.
+    
+    Args:
+        top_n: Número máximo de equipos a obtener (por defecto MAX_RESULTADOS)
+        desde_el_final: Si True, obtiene los equipos con peor posición en el ranking
+        columns: Columnas a seleccionar (por defecto todas); permite omitir
+            columnas de texto grandes como explicacion_detallada
+        fecha: Fecha de ejecución ya resuelta (por defecto se consulta la más reciente)
+    
     Returns:
-        pd.DataFrame: DataFrame con los resultados
+        pd.DataFrame: DataFrame con los resultados, ordenado por posición
     """
     try:
-        # Importar componentes CP para acceder a la base de datos
-        import sys
-        sys.path.append('cp_data_analysis_v2/src')
-        from cp_db_manager import get_db_manager
+        if fecha is None:
+            fecha = _get_max_fecha()
+        df = _load_for_fecha(
+            fecha, top_n or MAX_RESULTADOS, desde_el_final, tuple(columns or COLUMNAS_RESULTADOS)
+        ) if fecha is not None else pd.DataFrame()
+        
+        if df.empty:
+            logger.warning("No se encontraron resultados en la tabla nv_unified_scoring")
+            return pd.DataFrame()
         
-        db_manager = get_db_manager()
+        logger.info(f"Resultados obtenidos: {len(df)} equipos")
+        # Copia para que los llamadores no alteren la versión memoizada
+        return df.copy()
         
-        # Consultar resultados más recientes
+    except Exception as e:
+        logger.error(f"Error obteniendo resultados: {str(e)}")
+        return pd.DataFrame()
+
+def get_explicacion_detallada(equipo, fecha):
+    """
+    Obtiene la explicación detallada de un solo equipo (columna de texto grande).
+    
+    Args:
+        equipo: Nombre del equipo
+        fecha: Fecha de ejecución de los resultados mostrados
+    
+    Returns:
+        str: Explicación detallada, o None si no se encuentra
+    """
+    try:
         query = """
-        SELECT TOP 1000
-            equipo, area_cp, unidades_hdd, puntuacion_final, posicion_ranking,
-            categoria_final, cp_llenado, cp_llenado_score, cp_inestabilidad, cp_inestabilidad_score,
-            cp_tasa_cambio, cp_tasa_cambio_score, hdd_uso, hdd_uso_score, hdd_inestabilidad,
-            hdd_inestabilidad_score, hdd_tasa_cambio, hdd_tasa_cambio_score,
-            explicacion_detallada, recomendaciones, registros_cp, registros_hdd, fecha_ejecucion
-        FROM nv_unified_scoring 
-        WHERE fecha_ejecucion = (
-            SELECT MAX(fecha_ejecucion) 
-            FROM nv_unified_scoring
-        )
-        ORDER BY posicion_ranking
+        SELECT TOP (:top_n)
+            explicacion_detallada
+        FROM nv_unified_scoring
+        WHERE fecha_ejecucion = :fecha AND equipo = :equipo
         """
+        df = _read_query(query, {'top_n': 1, 'fecha': fecha, 'equipo': equipo})
+        return None if df.empty else df['explicacion_detallada'].iloc[0]
         
-        resultados = db_manager.execute_query(query)
+    except Exception as e:
+        logger.error(f"Error obteniendo explicación detallada: {str(e)}")
+        return None
+
+def get_summary_statistics(fecha=None):
+    """
+    Obtiene las estadísticas resumidas agregadas directamente en SQL Server.
+    
+    Una sola consulta con GROUPING SETS devuelve el total general, una fila por
+    categoría y una fila por área CP, sin transferir las filas individuales.
+    
+    Args:
+        fecha: Fecha de ejecución ya resuelta (por defecto la más reciente, en la misma consulta)
+    
+    Returns:
+        pd.DataFrame: Una fila por agrupación ('total', 'categoria' o 'area')
+    """
+    try:
+        if fecha is None:
+            filtro_fecha = "(SELECT MAX(fecha_ejecucion) FROM nv_unified_scoring)"
+            params = None
+        else:
+            filtro_fecha = ":fecha"
+            params = {'fecha': fecha}
+        
+        query = f"""
+        SELECT
+            CASE
+                WHEN GROUPING(categoria_final) = 0 THEN 'categoria'
+                WHEN GROUPING(area_cp) = 0 THEN 'area'
+                ELSE 'total'
+            END AS agrupacion,
+            categoria_final, area_cp,
+            COUNT(*) AS equipos,
+            AVG(CAST(puntuacion_final AS FLOAT)) AS promedio,
+            STDEV(puntuacion_final) AS desviacion,
+            MIN(puntuacion_final) AS minimo,
+            MAX(puntuacion_final) AS maximo,
+            SUM(CASE WHEN registros_cp > 0 THEN 1 ELSE 0 END) AS con_cp,
+            SUM(CASE WHEN registros_hdd > 0 THEN 1 ELSE 0 END) AS con_hdd,
+            SUM(CASE WHEN registros_cp > 0 AND registros_hdd > 0 THEN 1 ELSE 0 END) AS con_ambos,
+            MAX(fecha_ejecucion) AS fecha_ejecucion
+        FROM nv_unified_scoring
+        WHERE fecha_ejecucion = {filtro_fecha}
+        GROUP BY GROUPING SETS ((categoria_final), (area_cp), ())
+        """
         
-        if not resultados:
+        stats = _read_query(query, params)
+        
+        # El grouping set () devuelve siempre la fila total, aunque no haya filas (COUNT 0, AVG NULL)
+        total = stats[stats['agrupacion'] == 'total'] if not stats.empty else stats
+        if total.empty or total['equipos'].iloc[0] == 0 or pd.isna(total['promedio'].iloc[0]):
             logger.warning("No se encontraron resultados en la tabla nv_unified_scoring")
             return pd.DataFrame()
         
-        df = pd.DataFrame(resultados)
-        logger.info(f"Resultados obtenidos: {len(df)} equipos")
-        return df
+        return stats
         
     except Exception as e:
-        logger.error(f"Error obteniendo resultados: {str(e)}")
+        logger.error(f"Error obteniendo estadísticas: {str(e)}")
         return pd.DataFrame()
 
-def show_summary_statistics(df):
+def show_summary_statistics(stats):
     """
     Muestra estadísticas resumidas de los resultados.
     
     Args:
-        df: DataFrame con resultados
+        stats: DataFrame de estadísticas agregadas (ver get_summary_statistics)
     """
-    if df.empty:
+    if stats.empty:
         print("❌ No hay datos para mostrar")
         return
     
-    print("\n" + "="*80)
-    print("📊 ESTADÍSTICAS GENERALES - SISTEMA DE PUNTUACIÓN UNIFICADO")
-    print("="*80)
+    total = stats[stats['agrupacion'] == 'total'].iloc[0]
+    
+    # Acumular la salida y escribirla de una vez
+    out = []
+    out.append("\n" + "="*80)
+    out.append("📊 ESTADÍSTICAS GENERALES - SISTEMA DE PUNTUACIÓN UNIFICADO")
+    out.append("="*80)
     
     # Información básica
-    print(f"📅 Fecha de análisis: {df['fecha_ejecucion'].iloc[0]}")
-    print(f"⚙️  Total de equipos: {len(df)}")
-    print(f"🏭 Equipos con datos CP: {df['registros_cp'].gt(0).sum()}")
-    print(f"💾 Equipos con datos HDD: {df['registros_hdd'].gt(0).sum()}")
-    print(f"🔄 Equipos con ambos datos: {(df['registros_cp'].gt(0) & df['registros_hdd'].gt(0)).sum()}")
+    out.append(f"📅 Fecha de análisis: {total['fecha_ejecucion']}")
+    out.append(f"⚙️  Total de equipos: {total['equipos']}")
+    out.append(f"🏭 Equipos con datos CP: {total['con_cp']}")
+    out.append(f"💾 Equipos con datos HDD: {total['con_hdd']}")
+    out.append(f"🔄 Equipos con ambos datos: {total['con_ambos']}")
     
     # Estadísticas de puntuación
-    print(f"\n🎯 ESTADÍSTICAS DE PUNTUACIÓN:")
-    print(f"   - Puntuación promedio: {df['puntuacion_final'].mean():.2f}")
-    print(f"   - Puntuación máxima: {df['puntuacion_final'].max():.2f}")
-    print(f"   - Puntuación mínima: {df['puntuacion_final'].min():.2f}")
-    print(f"   - Desviación estándar: {df['puntuacion_final'].std():.2f}")
+    out.append(f"\n🎯 ESTADÍSTICAS DE PUNTUACIÓN:")
+    out.append(f"   - Puntuación promedio: {total['promedio']:.2f}")
+    out.append(f"   - Puntuación máxima: {total['maximo']:.2f}")
+    out.append(f"   - Puntuación mínima: {total['minimo']:.2f}")
+    out.append(f"   - Desviación estándar: {total['desviacion']:.2f}")
     
     # Distribución por categorías
-    print(f"\n📈 DISTRIBUCIÓN POR CATEGORÍAS:")
-    categoria_counts = df['categoria_final'].value_counts()
-    for categoria, count in categoria_counts.items():
-        porcentaje = (count / len(df)) * 100
-        print(f"   - {categoria}: {count} equipos ({porcentaje:.1f}%)")
+    out.append(f"\n📈 DISTRIBUCIÓN POR CATEGORÍAS:")
+    categorias = stats[stats['agrupacion'] == 'categoria'].sort_values('equipos', ascending=False)
+    for categoria, count in zip(categorias['categoria_final'], categorias['equipos']):
+        porcentaje = (count / total['equipos']) * 100
+        out.append(f"   - {categoria}: {count} equipos ({porcentaje:.1f}%)")
     
     # Top áreas
-    if 'area_cp' in df.columns and df['area_cp'].notna().any():
-        print(f"\n🏭 TOP 5 ÁREAS CP POR PUNTUACIÓN PROMEDIO:")
-        areas_avg = df.groupby('area_cp')['puntuacion_final'].agg(['mean', 'count']).sort_values('mean', ascending=False)
-        for area, (avg_score, count) in areas_avg.head(5).iterrows():
-            print(f"   - {area}: {avg_score:.2f}pts ({count} equipos)")
+    areas = stats[(stats['agrupacion'] == 'area') & stats['area_cp'].notna()]
+    if not areas.empty:
+        out.append(f"\n🏭 TOP 5 ÁREAS CP POR PUNTUACIÓN PROMEDIO:")
+        areas_avg = areas.sort_values('promedio', ascending=False).head(5)
+        for area, avg_score, count in zip(areas_avg['area_cp'], areas_avg['promedio'], areas_avg['equipos']):
+            out.append(f"   - {area}: {avg_score:.2f}pts ({count} equipos)")
+    
+    sys.stdout.write('\n'.join(out) + '\n')
 
 def show_top_performers(df, top_n=10):
     """
@@ -112,35 +359,39 @@ def show_top_performers(df, top_n=10):
     if df.empty:
         return
     
-    print(f"\n" + "="*80)
-    print(f"🏆 TOP {top_n} EQUIPOS - MEJOR PUNTUACIÓN")
-    print("="*80)
+    # Acumular la salida y escribirla de una vez
+    out = []
+    out.append(f"\n" + "="*80)
+    out.append(f"🏆 TOP {top_n} EQUIPOS - MEJOR PUNTUACIÓN")
+    out.append("="*80)
     
     top_equipos = df.head(top_n)
     
-    for _, row in top_equipos.iterrows():
-        print(f"\n🥇 Posición {row['posicion_ranking']:2d}: {row['equipo']}")
-        print(f"   📊 Puntuación: {row['puntuacion_final']:.2f}pts ({row['categoria_final']})")
-        print(f"   🏭 Área CP: {row['area_cp'] or 'N/A'}")
-        print(f"   💾 Unidades HDD: {len(row['unidades_hdd'].split(',')) if row['unidades_hdd'] else 0}")
+    for row in top_equipos.itertuples(index=False):
+        out.append(f"\n🥇 Posición {row.posicion_ranking:2d}: {row.equipo}")
+        out.append(f"   📊 Puntuación: {row.puntuacion_final:.2f}pts ({row.categoria_final})")
+        out.append(f"   🏭 Área CP: {_valor_o_na(row.area_cp)}")
+        out.append(f"   💾 Unidades HDD: {row.n_hdd}")
         
         # Mostrar puntuaciones individuales
         scores = []
-        if pd.notna(row['cp_llenado_score']):
-            scores.append(f"CP Llenado: {row['cp_llenado_score']:.1f}pts")
-        if pd.notna(row['cp_inestabilidad_score']):
-            scores.append(f"CP Estabilidad: {row['cp_inestabilidad_score']:.1f}pts")
-        if pd.notna(row['cp_tasa_cambio_score']):
-            scores.append(f"CP Cambios: {row['cp_tasa_cambio_score']:.1f}pts")
-        if pd.notna(row['hdd_uso_score']):
-            scores.append(f"HDD Uso: {row['hdd_uso_score']:.1f}pts")
-        if pd.notna(row['hdd_inestabilidad_score']):
-            scores.append(f"HDD Estabilidad: {row['hdd_inestabilidad_score']:.1f}pts")
-        if pd.notna(row['hdd_tasa_cambio_score']):
-            scores.append(f"HDD Cambios: {row['hdd_tasa_cambio_score']:.1f}pts")
+        if pd.notna(row.cp_llenado_score):
+            scores.append(f"CP Llenado: {row.cp_llenado_score:.1f}pts")
+        if pd.notna(row.cp_inestabilidad_score):
+            scores.append(f"CP Estabilidad: {row.cp_inestabilidad_score:.1f}pts")
+        if pd.notna(row.cp_tasa_cambio_score):
+            scores.append(f"CP Cambios: {row.cp_tasa_cambio_score:.1f}pts")
+        if pd.notna(row.hdd_uso_score):
+            scores.append(f"HDD Uso: {row.hdd_uso_score:.1f}pts")
+        if pd.notna(row.hdd_inestabilidad_score):
+            scores.append(f"HDD Estabilidad: {row.hdd_inestabilidad_score:.1f}pts")
+        if pd.notna(row.hdd_tasa_cambio_score):
+            scores.append(f"HDD Cambios: {row.hdd_tasa_cambio_score:.1f}pts")
         
-        print(f"   📈 Puntuaciones: {' | '.join(scores)}")
-        print(f"   💡 Recomendación: {row['recomendaciones']}")
+        out.append(f"   📈 Puntuaciones: {' | '.join(scores)}")
+        out.append(f"   💡 Recomendación: {row.recomendaciones}")
+    
+    sys.stdout.write('\n'.join(out) + '\n')
 
 def show_bottom_performers(df, bottom_n=10):
     """
@@ -153,111 +404,124 @@ def show_bottom_performers(df, bottom_n=10):
     if df.empty:
         return
     
-    print(f"\n" + "="*80)
-    print(f"⚠️  TOP {bottom_n} EQUIPOS - MENOR PUNTUACIÓN")
-    print("="*80)
+    # Acumular la salida y escribirla de una vez
+    out = []
+    out.append(f"\n" + "="*80)
+    out.append(f"⚠️  TOP {bottom_n} EQUIPOS - MENOR PUNTUACIÓN")
+    out.append("="*80)
     
     bottom_equipos = df.tail(bottom_n)
     
-    for _, row in bottom_equipos.iterrows():
-        print(f"\n🔴 Posición {row['posicion_ranking']:2d}: {row['equipo']}")
-        print(f"   📊 Puntuación: {row['puntuacion_final']:.2f}pts ({row['categoria_final']})")
-        print(f"   🏭 Área CP: {row['area_cp'] or 'N/A'}")
-        print(f"   💾 Unidades HDD: {len(row['unidades_hdd'].split(',')) if row['unidades_hdd'] else 0}")
+    # Máscara de puntuaciones bajas calculada una vez para todo el bloque
+    columnas, etiquetas = zip(*COLUMNAS_PUNTUACION)
+    score_cols = bottom_equipos[list(columnas)]
+    low_mask = score_cols.lt(50) & score_cols.notna()
+    
+    for row, scores, bajas in zip(bottom_equipos.itertuples(index=False),
+                                  score_cols.to_numpy(), low_mask.to_numpy()):
+        out.append(f"\n🔴 Posición {row.posicion_ranking:2d}: {row.equipo}")
+        out.append(f"   📊 Puntuación: {row.puntuacion_final:.2f}pts ({row.categoria_final})")
+        out.append(f"   🏭 Área CP: {_valor_o_na(row.area_cp)}")
+        out.append(f"   💾 Unidades HDD: {row.n_hdd}")
         
         # Mostrar puntuaciones individuales bajas
-        low_scores = []
-        if pd.notna(row['cp_llenado_score']) and row['cp_llenado_score'] < 50:
-            low_scores.append(f"CP Llenado: {row['cp_llenado_score']:.1f}pts")
-        if pd.notna(row['cp_inestabilidad_score']) and row['cp_inestabilidad_score'] < 50:
-            low_scores.append(f"CP Estabilidad: {row['cp_inestabilidad_score']:.1f}pts")
-        if pd.notna(row['cp_tasa_cambio_score']) and row['cp_tasa_cambio_score'] < 50:
-            low_scores.append(f"CP Cambios: {row['cp_tasa_cambio_score']:.1f}pts")
-        if pd.notna(row['hdd_uso_score']) and row['hdd_uso_score'] < 50:
-            low_scores.append(f"HDD Uso: {row['hdd_uso_score']:.1f}pts")
-        if pd.notna(row['hdd_inestabilidad_score']) and row['hdd_inestabilidad_score'] < 50:
-            low_scores.append(f"HDD Estabilidad: {row['hdd_inestabilidad_score']:.1f}pts")
-        if pd.notna(row['hdd_tasa_cambio_score']) and row['hdd_tasa_cambio_score'] < 50:
-            low_scores.append(f"HDD Cambios: {row['hdd_tasa_cambio_score']:.1f}pts")
+        low_scores = [
+            f"{etiqueta}: {score:.1f}pts"
+            for etiqueta, score, es_baja in zip(etiquetas, scores, bajas)
+            if es_baja
+        ]
         
         if low_scores:
-            print(f"   ⚠️  Puntuaciones bajas: {' | '.join(low_scores)}")
+            out.append(f"   ⚠️  Puntuaciones bajas: {' | '.join(low_scores)}")
         
-        print(f"   💡 Recomendación: {row['recomendaciones']}")
+        out.append(f"   💡 Recomendación: {row.recomendaciones}")
+    
+    sys.stdout.write('\n'.join(out) + '\n')
 
 def show_equipment_details(df, equipo_name):
     """
     Muestra detalles específicos de un equipo.
     
     Args:
-        df: DataFrame con resultados
+        df: DataFrame con resultados (idealmente indexado por 'equipo')
         equipo_name: Nombre del equipo a analizar
     """
     if df.empty:
         return
     
-    equipo_data = df[df['equipo'] == equipo_name]
+    # Búsqueda por índice hash en lugar de comparar toda la columna
+    lookup = df if df.index.name == 'equipo' else df.set_index('equipo', drop=False)
     
-    if equipo_data.empty:
+    if equipo_name not in lookup.index:
         print(f"❌ No se encontró información para el equipo: {equipo_name}")
         return
     
+    equipo_data = lookup.loc[[equipo_name]]
     row = equipo_data.iloc[0]
     
-    print(f"\n" + "="*80)
-    print(f"🔍 DETALLES DEL EQUIPO: {equipo_name}")
-    print("="*80)
+    # Acumular la salida y escribirla de una vez
+    out = []
+    out.append(f"\n" + "="*80)
+    out.append(f"🔍 DETALLES DEL EQUIPO: {equipo_name}")
+    out.append("="*80)
     
-    print(f"📊 PUNTUACIÓN GENERAL:")
-    print(f"   - Puntuación final: {row['puntuacion_final']:.2f}pts")
-    print(f"   - Posición en ranking: {row['posicion_ranking']}")
-    print(f"   - Categoría: {row['categoria_final']}")
+    out.append(f"📊 PUNTUACIÓN GENERAL:")
+    out.append(f"   - Puntuación final: {row['puntuacion_final']:.2f}pts")
+    out.append(f"   - Posición en ranking: {row['posicion_ranking']}")
+    out.append(f"   - Categoría: {row['categoria_final']}")
     
-    print(f"\n🏭 INFORMACIÓN GENERAL:")
-    print(f"   - Área CP: {row['area_cp'] or 'N/A'}")
-    print(f"   - Unidades HDD: {row['unidades_hdd'] or 'N/A'}")
-    print(f"   - Registros CP: {row['registros_cp']}")
-    print(f"   - Registros HDD: {row['registros_hdd']}")
+    out.append(f"\n🏭 INFORMACIÓN GENERAL:")
+    out.append(f"   - Área CP: {_valor_o_na(row['area_cp'])}")
+    out.append(f"   - Unidades HDD: {_valor_o_na(row['unidades_hdd'])}")
+    out.append(f"   - Registros CP: {row['registros_cp']}")
+    out.append(f"   - Registros HDD: {row['registros_hdd']}")
     
-    print(f"\n📈 PUNTUACIONES POR MÉTRICA:")
+    out.append(f"\n📈 PUNTUACIONES POR MÉTRICA:")
     
     # Métricas CP
     if pd.notna(row['cp_llenado']):
-        print(f"   🔧 CP Llenado:")
-        print(f"      - Valor: {row['cp_llenado']:.2f}")
-        print(f"      - Puntuación: {row['cp_llenado_score']:.1f}pts")
+        out.append(f"   🔧 CP Llenado:")
+        out.append(f"      - Valor: {row['cp_llenado']:.2f}")
+        out.append(f"      - Puntuación: {row['cp_llenado_score']:.1f}pts")
     
     if pd.notna(row['cp_inestabilidad']):
-        print(f"   🔧 CP Inestabilidad:")
-        print(f"      - Valor: {row['cp_inestabilidad']:.2f}")
-        print(f"      - Puntuación: {row['cp_inestabilidad_score']:.1f}pts")
+        out.append(f"   🔧 CP Inestabilidad:")
+        out.append(f"      - Valor: {row['cp_inestabilidad']:.2f}")
+        out.append(f"      - Puntuación: {row['cp_inestabilidad_score']:.1f}pts")
     
     if pd.notna(row['cp_tasa_cambio']):
-        print(f"   🔧 CP Tasa de Cambio:")
-        print(f"      - Valor: {row['cp_tasa_cambio']:.2f}")
-        print(f"      - Puntuación: {row['cp_tasa_cambio_score']:.1f}pts")
+        out.append(f"   🔧 CP Tasa de Cambio:")
+        out.append(f"      - Valor: {row['cp_tasa_cambio']:.2f}")
+        out.append(f"      - Puntuación: {row['cp_tasa_cambio_score']:.1f}pts")
     
     # Métricas HDD
     if pd.notna(row['hdd_uso']):
-        print(f"   💾 HDD Uso:")
-        print(f"      - Valor: {row['hdd_uso']:.2f}%")
-        print(f"      - Puntuación: {row['hdd_uso_score']:.1f}pts")
+        out.append(f"   💾 HDD Uso:")
+        out.append(f"      - Valor: {row['hdd_uso']:.2f}%")
+        out.append(f"      - Puntuación: {row['hdd_uso_score']:.1f}pts")
     
     if pd.notna(row['hdd_inestabilidad']):
-        print(f"   💾 HDD Inestabilidad:")
-        print(f"      - Valor: {row['hdd_inestabilidad']:.2f}")
-        print(f"      - Puntuación: {row['hdd_inestabilidad_score']:.1f}pts")
+        out.append(f"   💾 HDD Inestabilidad:")
+        out.append(f"      - Valor: {row['hdd_inestabilidad']:.2f}")
+        out.append(f"      - Puntuación: {row['hdd_inestabilidad_score']:.1f}pts")
     
     if pd.notna(row['hdd_tasa_cambio']):
-        print(f"   💾 HDD Tasa de Cambio:")
-        print(f"      - Valor: {row['hdd_tasa_cambio']:.2f}")
-        print(f"      - Puntuación: {row['hdd_tasa_cambio_score']:.1f}pts")
-    
-    print(f"\n💡 RECOMENDACIONES:")
-    print(f"   {row['recomendaciones']}")
-    
-    print(f"\n📝 EXPLICACIÓN DETALLADA:")
-    print(f"   {row['explicacion_detallada']}")
+        out.append(f"   💾 HDD Tasa de Cambio:")
+        out.append(f"      - Valor: {row['hdd_tasa_cambio']:.2f}")
+        out.append(f"      - Puntuación: {row['hdd_tasa_cambio_score']:.1f}pts")
+    
+    out.append(f"\n💡 RECOMENDACIONES:")
+    out.append(f"   {row['recomendaciones']}")
+    
+    # La explicación detallada se carga solo para el equipo consultado
+    if 'explicacion_detallada' in row.index:
+        explicacion = row['explicacion_detallada']
+    else:
+        explicacion = get_explicacion_detallada(equipo_name, row['fecha_ejecucion'])
+    out.append(f"\n📝 EXPLICACIÓN DETALLADA:")
+    out.append(f"   {explicacion}")
+    
+    sys.stdout.write('\n'.join(out) + '\n')
 
 def show_area_analysis(df):
     """
@@ -275,31 +539,33 @@ def show_area_analysis(df):
         print("❌ No hay datos de áreas para analizar")
         return
     
-    print(f"\n" + "="*80)
-    print("🏭 ANÁLISIS POR ÁREA CP")
-    print("="*80)
-    
-    # Agrupar por área
-    area_stats = areas_with_data.groupby('area_cp').agg({
-        'puntuacion_final': ['mean', 'std', 'count', 'min', 'max'],
-        'categoria_final': lambda x: x.value_counts().to_dict()
-    }).round(2)
-    
-    for area in area_stats.index:
-        stats = area_stats.loc[area]
-        print(f"\n🏭 ÁREA: {area}")
-        print(f"   📊 Estadísticas:")
-        print(f"      - Equipos: {stats[('puntuacion_final', 'count')]}")
-        print(f"      - Puntuación promedio: {stats[('puntuacion_final', 'mean')]:.2f}pts")
-        print(f"      - Desviación estándar: {stats[('puntuacion_final', 'std')]:.2f}")
-        print(f"      - Rango: {stats[('puntuacion_final', 'min')]:.2f} - {stats[('puntuacion_final', 'max')]:.2f}pts")
+    # Acumular la salida y escribirla de una vez
+    out = []
+    out.append(f"\n" + "="*80)
+    out.append("🏭 ANÁLISIS POR ÁREA CP")
+    out.append("="*80)
+    
+    # Agrupar por área (estadísticas y distribución de categorías vectorizadas)
+    area_stats = areas_with_data.groupby('area_cp')['puntuacion_final'].describe().round(2)
+    categorias_por_area = pd.crosstab(areas_with_data['area_cp'], areas_with_data['categoria_final'])
+    
+    for area, stats in area_stats.iterrows():
+        out.append(f"\n🏭 ÁREA: {area}")
+        out.append(f"   📊 Estadísticas:")
+        out.append(f"      - Equipos: {int(stats['count'])}")
+        out.append(f"      - Puntuación promedio: {stats['mean']:.2f}pts")
+        out.append(f"      - Desviación estándar: {stats['std']:.2f}")
+        out.append(f"      - Rango: {stats['min']:.2f} - {stats['max']:.2f}pts")
         
         # Mostrar distribución de categorías
-        categorias = stats[('categoria_final', '')]
-        if categorias:
-            print(f"   📈 Distribución de categorías:")
+        categorias = categorias_por_area.loc[area].sort_values(ascending=False)
+        categorias = categorias[categorias > 0]
+        if not categorias.empty:
+            out.append(f"   📈 Distribución de categorías:")
             for categoria, count in categorias.items():
-                print(f"      - {categoria}: {count} equipos")
+                out.append(f"      - {categoria}: {count} equipos")
+    
+    sys.stdout.write('\n'.join(out) + '\n')
 
 def main():
     """
@@ -308,25 +574,51 @@ def main():
     print("🔍 SISTEMA DE PUNTUACIÓN UNIFICADO - VISUALIZADOR DE RESULTADOS")
     print("="*80)
     
-    # Obtener resultados
-    df = get_latest_results()
+    # Resolver una sola vez la ejecución a mostrar
+    try:
+        fecha = _get_max_fecha()
+    except Exception as e:
+        logger.error(f"Error obteniendo la fecha de ejecución: {str(e)}")
+        fecha = None
     
-    if df.empty:
+    if fecha is None:
         print("❌ No se encontraron resultados. Ejecuta primero el análisis unificado.")
         return
     
-    # Mostrar estadísticas generales
-    show_summary_statistics(df)
+    # Lanzar en paralelo la consulta de agregados y la carga de resultados (sin la
+    # explicación detallada); listados y análisis por área salen de esa única carga
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futuro_stats = executor.submit(get_summary_statistics, fecha)
+        futuro_df = executor.submit(get_latest_results, None, False, COLUMNAS_CARGA, fecha)
+        
+        stats = futuro_stats.result()
+        
+        if stats.empty:
+            print("❌ No se encontraron resultados. Ejecuta primero el análisis unificado.")
+            return
+        
+        # Mostrar estadísticas generales mientras llegan los resultados
+        show_summary_statistics(stats)
+        
+        df = futuro_df.result()
     
     # Mostrar mejores equipos
     show_top_performers(df, top_n=10)
     
-    # Mostrar equipos con menor puntuación
-    show_bottom_performers(df, bottom_n=5)
+    # Mostrar equipos con menor puntuación: si la carga llegó al límite de filas,
+    # los últimos del ranking no están en ella y se piden aparte
+    if len(df) >= MAX_RESULTADOS:
+        bottom = get_latest_results(top_n=5, desde_el_final=True, columns=COLUMNAS_LISTADO, fecha=fecha)
+    else:
+        bottom = df
+    show_bottom_performers(bottom, bottom_n=5)
     
     # Mostrar análisis por área
     show_area_analysis(df)
     
+    # Índice por equipo construido una sola vez para la búsqueda interactiva
+    lookup = df.set_index('equipo', drop=False) if not df.empty else df
+    
     # Interactivo: buscar equipo específico
     print(f"\n" + "="*80)
     print("🔍 BÚSQUEDA DE EQUIPO ESPECÍFICO")
@@ -339,7 +631,7 @@ def main():
             break
         
         if equipo:
-            show_equipment_details(df, equipo)
+            show_equipment_details(lookup, equipo)
         else:
             print("❌ Por favor ingresa un nombre de equipo válido")
     
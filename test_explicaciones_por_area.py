@@ -3,7 +3,34 @@
 
 import pandas as pd
 import numpy as np
-import ast
+
+try:
+    from numba import njit
+except ImportError:
+    # numba es opcional: sin él se usa la misma función en NumPy puro
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+@njit(cache=True)
+def _pct_score(value, sorted_vals, lower_better):
+    """Percentil de value dentro de sorted_vals (ordenado, sin NaN)"""
+    idx = np.searchsorted(sorted_vals, value)
+    pct = (idx / len(sorted_vals)) * 100.0
+    return 100.0 - pct if lower_better else pct
+
+# Compilar en la importación para no pagar el coste del JIT en el primer equipo
+_pct_score(0.0, np.zeros(1), True)
+
+# Plantillas de explicación indexadas por np.digitize(score, _UMBRALES): <40, <60, <80, >=80
+_UMBRALES = np.array([40, 60, 80])
+_PLANTILLAS = (
+    "**{nombre} Crítica ({score:.1f}pts)**: Con una carga de {valor:.1f} en {area}, el equipo está experimentando problemas significativos de rendimiento.",
+    "**{nombre} Regular ({score:.1f}pts)**: La carga de {valor:.1f} en {area} sugiere que el equipo podría estar experimentando problemas de rendimiento.",
+    "**{nombre} Buena ({score:.1f}pts)**: Con una carga de {valor:.1f} en {area}, el equipo tiene un rendimiento aceptable.",
+    "**{nombre} Excelente ({score:.1f}pts)**: El equipo mantiene una carga de {valor:.1f} en {area}, lo que indica un rendimiento excepcional.",
+)
 
 def test_explicaciones_por_area():
     """Prueba las explicaciones por área usando datos existentes"""
@@ -12,6 +39,13 @@ def test_explicaciones_por_area():
     df_cp = pd.read_csv('ranking_cp.csv')
     df_hdd = pd.read_csv('ranking_hdd.csv')
     
+    # Parsear la lista de áreas una sola vez ("['PP_NFD', 'IOLOAD']" -> ['PP_NFD', 'IOLOAD'])
+    df_cp['areas_list'] = (
+        df_cp['areas_cp'].fillna('[]').astype(str)
+        .str.replace(r"[\[\]' ]", '', regex=True)
+        .str.split(',')
+    )
+    
     print("=== PRUEBA DE EXPLICACIONES POR ÁREA ===")
     print("=" * 60)
     
@@ -28,88 +62,78 @@ def test_explicaciones_por_area():
         'MAXMEM': 'Memoria máxima utilizada'
     }
     
-    def calculate_percentile_score(value, all_values, direction='lower_better'):
-        """Calcula el puntaje basado en percentiles"""
-        if pd.isna(value) or len(all_values) == 0:
-            return 0.0
-        
-        valid_values = [v for v in all_values if not pd.isna(v)]
-        if len(valid_values) == 0:
+    def calculate_percentile_score(value, sorted_values, direction='lower_better'):
+        """Calcula el puntaje basado en percentiles (sorted_values: array ordenado sin NaN)"""
+        if pd.isna(value) or len(sorted_values) == 0:
             return 0.0
         
-        percentile = (sum(1 for x in valid_values if x < value) / len(valid_values)) * 100
-        
-        if direction == 'lower_better':
-            percentile = 100 - percentile
+        return _pct_score(float(value), sorted_values, direction == 'lower_better')
+    
+    def calculate_percentile_scores(values, sorted_values, direction='lower_better'):
+        """Versión vectorizada: un searchsorted para todo el array de valores (NaN -> 0)"""
+        values = np.asarray(values, dtype=np.float64)
+        if len(sorted_values) == 0:
+            return np.zeros(len(values))
         
-        return percentile
+        scores = _pct_score(values, sorted_values, direction == 'lower_better')
+        return np.where(np.isnan(values), 0.0, scores)
     
-    def generate_area_explanation(equipo, area, valor, all_values, area_nombre):
-        """Genera explicación específica por área"""
-        score = calculate_percentile_score(valor, all_values, 'lower_better')
+    def generate_area_explanation(equipo, area, valor, score, area_nombre):
+        """Genera explicación específica por área (score ya calculado)"""
         
-        if score >= 80:
-            return f"**{area_nombre} Excelente ({score:.1f}pts)**: El equipo mantiene una carga de {valor:.1f} en {area}, lo que indica un rendimiento excepcional."
-        elif score >= 60:
-            return f"**{area_nombre} Buena ({score:.1f}pts)**: Con una carga de {valor:.1f} en {area}, el equipo tiene un rendimiento aceptable."
-        elif score >= 40:
-            return f"**{area_nombre} Regular ({score:.1f}pts)**: La carga de {valor:.1f} en {area} sugiere que el equipo podría estar experimentando problemas de rendimiento."
-        else:
-            return f"**{area_nombre} Crítica ({score:.1f}pts)**: Con una carga de {valor:.1f} en {area}, el equipo está experimentando problemas significativos de rendimiento."
+        bucket = int(np.digitize(score, _UMBRALES))
+        return _PLANTILLAS[bucket].format(nombre=area_nombre, score=score, valor=valor, area=area)
+    
+    # Valores de referencia ordenados (una sola vez) para calcular percentiles
+    sorted_llenado = np.sort(df_cp['cp_llenado'].dropna().to_numpy())
+    sorted_inestabilidad = np.sort(df_cp['cp_inestabilidad'].dropna().to_numpy())
+    sorted_tasa_cambio = np.sort(df_cp['cp_tasa_cambio'].dropna().to_numpy())
     
     # Procesar algunos equipos de ejemplo
     equipos_ejemplo = df_cp.head(5)
     
-    for idx, equipo in equipos_ejemplo.iterrows():
-        print(f"\n🔍 EQUIPO: {equipo['equipo']}")
+    # Puntajes de las tres métricas para todos los equipos de ejemplo en bloque
+    scores_llenado = calculate_percentile_scores(equipos_ejemplo['cp_llenado'], sorted_llenado)
+    scores_inestabilidad = calculate_percentile_scores(equipos_ejemplo['cp_inestabilidad'], sorted_inestabilidad)
+    scores_tasa_cambio = calculate_percentile_scores(equipos_ejemplo['cp_tasa_cambio'], sorted_tasa_cambio)
+    
+    for equipo, llenado_score, inestabilidad_score, tasa_cambio_score in zip(
+            equipos_ejemplo.itertuples(index=False), scores_llenado, scores_inestabilidad, scores_tasa_cambio):
+        print(f"\n🔍 EQUIPO: {equipo.equipo}")
         print("-" * 50)
         
-        # Obtener áreas del equipo
-        areas_equipo = equipo['areas_cp']
-        try:
-            if isinstance(areas_equipo, str):
-                areas_list = ast.literal_eval(areas_equipo)
-                if not isinstance(areas_list, list):
-                    areas_list = [areas_list]
-            else:
-                areas_list = [areas_equipo]
-        except:
-            areas_list = [str(areas_equipo)]
+        # Áreas del equipo (parseadas al cargar los datos)
+        areas_list = equipo.areas_list
         
         print(f"📋 Áreas CP: {', '.join(areas_list)}")
-        print(f"📊 Puntuación actual: {equipo['score_final']:.1f}")
+        print(f"📊 Puntuación actual: {equipo.score_final:.1f}")
         
         # Generar explicaciones por área
         explicaciones_por_area = []
         
+        # Simular valores por área (en realidad necesitaríamos datos originales)
+        # Por ahora usamos los valores agregados como aproximación
+        llenado_valor = equipo.cp_llenado
+        inestabilidad_valor = equipo.cp_inestabilidad
+        tasa_cambio_valor = equipo.cp_tasa_cambio
+        
         for area in areas_list:
             if area in areas_cp_significado:
                 area_nombre = areas_cp_significado[area]
                 
-                # Simular valores por área (en realidad necesitaríamos datos originales)
-                # Por ahora usamos los valores agregados como aproximación
-                llenado_valor = equipo['cp_llenado']
-                inestabilidad_valor = equipo['cp_inestabilidad']
-                tasa_cambio_valor = equipo['cp_tasa_cambio']
-                
-                # Obtener todos los valores para calcular percentiles
-                todos_llenado = df_cp['cp_llenado'].dropna()
-                todos_inestabilidad = df_cp['cp_inestabilidad'].dropna()
-                todos_tasa_cambio = df_cp['cp_tasa_cambio'].dropna()
-                
                 # Generar explicaciones para cada métrica
                 explicacion_llenado = generate_area_explanation(
-                    equipo['equipo'], area, llenado_valor, todos_llenado, 
+                    equipo.equipo, area, llenado_valor, llenado_score, 
                     f"Llenado en {area_nombre}"
                 )
                 
                 explicacion_inestabilidad = generate_area_explanation(
-                    equipo['equipo'], area, inestabilidad_valor, todos_inestabilidad,
+                    equipo.equipo, area, inestabilidad_valor, inestabilidad_score,
                     f"Estabilidad en {area_nombre}"
                 )
                 
                 explicacion_tasa_cambio = generate_area_explanation(
-                    equipo['equipo'], area, tasa_cambio_valor, todos_tasa_cambio,
+                    equipo.equipo, area, tasa_cambio_valor, tasa_cambio_score,
                     f"Cambios en {area_nombre}"
                 )
                 
@@ -126,7 +150,7 @@ def test_explicaciones_por_area():
         
         # Generar recomendaciones
         recomendaciones = []
-        if equipo['score_final'] < 50:
+        if equipo.score_final < 50:
             recomendaciones.append("Revisión completa del equipo requerida")
         
         for explicacion in explicaciones_por_area:
@@ -138,7 +162,7 @@ def test_explicaciones_por_area():
                 recomendaciones.append(f"Optimizar rendimiento en {area}")
         
         if not recomendaciones:
-            if equipo['score_final'] >= 80:
+            if equipo.score_final >= 80:
                 recomendaciones.append("Mantener estándares actuales")
             else:
                 recomendaciones.append("Monitorear rendimiento continuamente")
@@ -167,8 +191,7 @@ def test_explicaciones_por_area():
     llenado_anterior = equipo_ejemplo['cp_llenado']
     
     # Simular puntuación anterior (higher_better)
-    todos_llenado = df_cp['cp_llenado'].dropna()
-    score_anterior = (sum(1 for x in todos_llenado if x < llenado_anterior) / len(todos_llenado)) * 100
+    score_anterior = calculate_percentile_score(llenado_anterior, sorted_llenado, 'higher_better')
     
     # Puntuación nueva (lower_better)
     score_nuevo = 100 - score_anterior
@@ -7,285 +7,484 @@ Script de prueba para el sistema de puntuación unificado.
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import io
 import logging
+import math
+import sys
+import threading
+import time
+import traceback
+
+# Rutas de los componentes CP y HDD (una sola vez, sin duplicados)
+for _ruta in ('cp_data_analysis_v2/src', 'hdd_data_analysis_v2/src'):
+    if _ruta not in sys.path:
+        sys.path.append(_ruta)
+
+try:
+    from unified_scoring_system import UnifiedScoringSystem, _percentile_kernel
+    _IMPORT_ERROR = None
+except ImportError as e:
+    UnifiedScoringSystem = _percentile_kernel = None
+    _IMPORT_ERROR = e
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def test_percentile_calculation():
+# Instancia compartida del sistema de puntuación (se crea una sola vez)
+_SCORER = None
+
+class _Buf:
     """
-    Prueba el cálculo de percentiles.
+    Acumula las líneas de una prueba y las escribe en stdout de una sola vez
+    (también si la prueba termina con una excepción).
     """
-    print("🧪 PRUEBA 1: Cálculo de Percentiles")
-    print("-" * 50)
     
-    # Importar función de percentiles
-    from unified_scoring_system import UnifiedScoringSystem
+    def __init__(self):
+        self.lines = []
     
-    scoring_system = UnifiedScoringSystem()
+    def emit(self, line=""):
+        self.lines.append(str(line))
     
-    # Datos de prueba
-    test_values = [10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+    def flush(self):
+        if self.lines:
+            sys.stdout.write('\n'.join(self.lines) + '\n')
+            self.lines = []
     
-    # Probar percentiles para valores específicos
-    test_cases = [
-        (25, 'higher_better', 'Valor bajo, dirección mayor=mejor'),
-        (75, 'higher_better', 'Valor alto, dirección mayor=mejor'),
-        (25, 'lower_better', 'Valor bajo, dirección menor=mejor'),
-        (75, 'lower_better', 'Valor alto, dirección menor=mejor')
-    ]
+    def __enter__(self):
+        return self
     
-    for value, direction, description in test_cases:
-        score = scoring_system.calculate_percentile_score(value, test_values, direction)
-        print(f"   {description}: {value} → {score:.1f}pts")
+    def __exit__(self, *exc_info):
+        self.flush()
+        return False
+
+def _get_scorer():
+    """
+    Devuelve la instancia compartida de UnifiedScoringSystem, creándola en el primer uso.
     
-    print("✅ Prueba de percentiles completada\n")
+    El estado se reinicia en run_all_tests antes de cada iteración, no aquí: las pruebas
+    corren en paralelo y un reinicio por prueba pisaría el estado de las demás.
+    """
+    global _SCORER
+    if _SCORER is None:
+        _SCORER = UnifiedScoringSystem()
+    return _SCORER
+
+def test_percentile_calculation():
+    """
+    Prueba el cálculo de percentiles.
+    """
+    with _Buf() as buf:
+        buf.emit("🧪 PRUEBA 1: Cálculo de Percentiles")
+        buf.emit("-" * 50)
+        
+        # Obtener el sistema de puntuación compartido
+        scoring_system = _get_scorer()
+        
+        # Datos de prueba
+        test_values = [10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+        
+        # Probar percentiles para valores específicos
+        test_cases = [
+            (25, 'higher_better', 'Valor bajo, dirección mayor=mejor'),
+            (75, 'higher_better', 'Valor alto, dirección mayor=mejor'),
+            (25, 'lower_better', 'Valor bajo, dirección menor=mejor'),
+            (75, 'lower_better', 'Valor alto, dirección menor=mejor')
+        ]
+        
+        # Calcular en bloque todos los valores de cada dirección
+        scores = {}
+        for direction in ('higher_better', 'lower_better'):
+            values = [value for value, case_direction, _ in test_cases if case_direction == direction]
+            batch = scoring_system.calculate_percentile_scores(values, test_values, direction)
+            scores.update({(value, direction): score for value, score in zip(values, batch)})
+        
+        for value, direction, description in test_cases:
+            score = scores[(value, direction)]
+            buf.emit(f"   {description}: {value} → {score:.1f}pts")
+        
+        # Verificar paridad con el kernel compilado
+        sorted_values = np.asarray(sorted(test_values), dtype=np.float64)
+        for value, direction, _ in test_cases:
+            kernel_score = _percentile_kernel(float(value), sorted_values, direction == 'higher_better')
+            assert abs(kernel_score - scores[(value, direction)]) < 1e-9, (value, direction)
+        
+        buf.emit("✅ Prueba de percentiles completada\n")
 
 def test_metric_configs():
     """
     Prueba la configuración de métricas.
     """
-    print("🧪 PRUEBA 2: Configuración de Métricas")
-    print("-" * 50)
-    
-    from unified_scoring_system import UnifiedScoringSystem
-    
-    scoring_system = UnifiedScoringSystem()
-    
-    # Verificar que los pesos sumen 1.0
-    total_weight = sum(config['weight'] for config in scoring_system.metric_configs.values())
-    print(f"   Total de pesos: {total_weight:.3f}")
-    
-    if abs(total_weight - 1.0) < 0.001:
-        print("   ✅ Los pesos suman correctamente 1.0")
-    else:
-        print(f"   ❌ Error: Los pesos suman {total_weight}, deberían sumar 1.0")
-    
-    # Mostrar configuración de métricas
-    print("\n   Configuración de métricas:")
-    for metric_name, config in scoring_system.metric_configs.items():
-        print(f"   - {metric_name}: {config['weight']*100:.0f}% ({config['direction']})")
-    
-    print("✅ Prueba de configuración completada\n")
+    with _Buf() as buf:
+        buf.emit("🧪 PRUEBA 2: Configuración de Métricas")
+        buf.emit("-" * 50)
+        
+        scoring_system = _get_scorer()
+        
+        # Verificar que los pesos sumen 1.0
+        weights = [config['weight'] for config in scoring_system.metric_configs.values()]
+        total_weight = math.fsum(weights)  # Suma exacta, sin deriva de redondeo
+        buf.emit(f"   Total de pesos: {total_weight:.3f}")
+        
+        if abs(total_weight - 1.0) < 0.001:
+            buf.emit("   ✅ Los pesos suman correctamente 1.0")
+        else:
+            buf.emit(f"   ❌ Error: Los pesos suman {total_weight}, deberían sumar 1.0")
+        
+        # Mostrar configuración de métricas
+        buf.emit("\n   Configuración de métricas:")
+        for metric_name, config in scoring_system.metric_configs.items():
+            buf.emit(f"   - {metric_name}: {config['weight']*100:.0f}% ({config['direction']})")
+        
+        buf.emit("✅ Prueba de configuración completada\n")
 
 def test_scoring_calculation():
     """
     Prueba el cálculo de puntuaciones con datos simulados.
     """
-    print("🧪 PRUEBA 3: Cálculo de Puntuaciones")
-    print("-" * 50)
-    
-    from unified_scoring_system import UnifiedScoringSystem
-    
-    scoring_system = UnifiedScoringSystem()
-    
-    # Crear datos simulados de CP
-    fechas = [datetime.now() - timedelta(days=i) for i in range(7)]
-    cp_data = {
-        'df_AREA1': pd.DataFrame({
-            'codigo': ['COD1'] * 21,
-            'fecha': fechas * 3,
-            'equipo': ['Equipo_A'] * 7 + ['Equipo_B'] * 7 + ['Equipo_C'] * 7,
-            'area': ['AREA1'] * 21,
-            'valor': [800] * 7 + [600] * 7 + [400] * 7,  # Valores diferentes para cada equipo
-            'actualizacion': [datetime.now()] * 21
-        })
-    }
-    
-    # Crear datos simulados de HDD
-    hdd_data = {
-        'df_C': pd.DataFrame({
-            'codigo': ['HDD1'] * 21,
-            'fecha': fechas * 3,
-            'equipo': ['Equipo_A'] * 7 + ['Equipo_B'] * 7 + ['Equipo_C'] * 7,
-            'unidad': ['C:'] * 21,
-            'uso': [0.3] * 7 + [0.6] * 7 + [0.8] * 7,  # Valores diferentes para cada equipo
-            'actualizacion': [datetime.now()] * 21
-        })
-    }
-    
-    # Calcular métricas
-    cp_metrics = scoring_system.calculate_cp_metrics(cp_data)
-    hdd_metrics = scoring_system.calculate_hdd_metrics(hdd_data)
-    
-    print(f"   Métricas CP calculadas: {len(cp_metrics)} equipos")
-    print(f"   Métricas HDD calculadas: {len(hdd_metrics)} equipos")
-    
-    # Calcular puntuaciones unificadas
-    df_scores = scoring_system.calculate_unified_scores(cp_metrics, hdd_metrics)
-    
-    if not df_scores.empty:
-        print(f"   Puntuaciones calculadas: {len(df_scores)} equipos")
+    with _Buf() as buf:
+        buf.emit("🧪 PRUEBA 3: Cálculo de Puntuaciones")
+        buf.emit("-" * 50)
         
-        # Mostrar resultados
-        for _, row in df_scores.iterrows():
-            print(f"   - {row['equipo']}: {row['puntuacion_final']:.2f}pts (Posición {row['posicion_ranking']})")
+        scoring_system = _get_scorer()
         
-        print("✅ Prueba de cálculo completada\n")
-    else:
-        print("   ❌ Error: No se pudieron calcular puntuaciones\n")
+        # Crear datos simulados de CP (arrays NumPy con tipos explícitos)
+        ahora = datetime.now()  # Una sola marca de tiempo para CP y HDD
+        fechas = (np.datetime64(ahora, 'ns') - np.arange(7).astype('timedelta64[D]')).astype('datetime64[ns]')
+        fechas_arr = np.tile(fechas, 3)
+        equipos = pd.Categorical(np.repeat(['Equipo_A', 'Equipo_B', 'Equipo_C'], 7))
+        actualizacion = np.full(21, np.datetime64(ahora), dtype='datetime64[ns]')
+        cp_data = {
+            'df_AREA1': pd.DataFrame({
+                'codigo': pd.Categorical(np.full(21, 'COD1')),
+                'fecha': fechas_arr,
+                'equipo': equipos,
+                'area': pd.Categorical(np.full(21, 'AREA1')),
+                'valor': np.repeat([800, 600, 400], 7).astype(np.int32),  # Valores diferentes para cada equipo
+                'actualizacion': actualizacion
+            })
+        }
+        
+        # Crear datos simulados de HDD
+        hdd_data = {
+            'df_C': pd.DataFrame({
+                'codigo': pd.Categorical(np.full(21, 'HDD1')),
+                'fecha': fechas_arr,
+                'equipo': equipos,
+                'unidad': pd.Categorical(np.full(21, 'C:')),
+                'uso': np.repeat([0.3, 0.6, 0.8], 7).astype(np.float64),  # Valores diferentes para cada equipo
+                'actualizacion': actualizacion
+            })
+        }
+        
+        # Calcular métricas
+        cp_metrics = scoring_system.calculate_cp_metrics(cp_data)
+        hdd_metrics = scoring_system.calculate_hdd_metrics(hdd_data)
+        
+        buf.emit(f"   Métricas CP calculadas: {len(cp_metrics)} equipos")
+        buf.emit(f"   Métricas HDD calculadas: {len(hdd_metrics)} equipos")
+        
+        # Calcular puntuaciones unificadas
+        df_scores = scoring_system.calculate_unified_scores(cp_metrics, hdd_metrics)
+        
+        if not df_scores.empty:
+            buf.emit(f"   Puntuaciones calculadas: {len(df_scores)} equipos")
+            
+            # Mostrar resultados
+            columnas = ['equipo', 'puntuacion_final', 'posicion_ranking']
+            for equipo, puntuacion, posicion in df_scores[columnas].itertuples(index=False, name=None):
+                buf.emit(f"   - {equipo}: {puntuacion:.2f}pts (Posición {posicion})")
+            
+            # Medir el cálculo con 1000 equipos (métricas ya agregadas)
+            n = 1000
+            rng = np.random.default_rng(0)
+            equipos_n = np.array([f'Equipo_{i:04d}' for i in range(n)], dtype=object)
+            cp_n = pd.DataFrame({
+                'equipo': equipos_n, 'area': 'AREA1', 'registros_cp': 7,
+                **{col: rng.random(n) for col in ('cp_llenado', 'cp_inestabilidad', 'cp_tasa_cambio')}
+            })
+            hdd_n = pd.DataFrame({
+                'equipo': equipos_n, 'unidad': 'C:', 'registros_hdd': 7,
+                **{col: rng.random(n) for col in ('hdd_uso', 'hdd_inestabilidad', 'hdd_tasa_cambio')}
+            })
+            t0 = time.perf_counter()
+            df_n = scoring_system.calculate_unified_scores(cp_n, hdd_n)
+            elapsed = time.perf_counter() - t0
+            estado = '✅' if len(df_n) == n and elapsed < 0.5 else '⚠️ '
+            buf.emit(f"   {estado} {len(df_n)} equipos en {elapsed:.3f}s (objetivo < 0.5s)")
+            
+            buf.emit("✅ Prueba de cálculo completada\n")
+        else:
+            buf.emit("   ❌ Error: No se pudieron calcular puntuaciones\n")
 
 def test_explanation_generation():
     """
     Prueba la generación de explicaciones.
     """
-    print("🧪 PRUEBA 4: Generación de Explicaciones")
-    print("-" * 50)
-    
-    from unified_scoring_system import UnifiedScoringSystem
-    
-    scoring_system = UnifiedScoringSystem()
-    
-    # Crear datos de prueba con puntuaciones
-    test_data = pd.DataFrame({
-        'equipo': ['Equipo_Test'],
-        'area_cp': ['AREA_TEST'],
-        'unidades_hdd': [['C:', 'D:']],
-        'puntuacion_final': [75.5],
-        'posicion_ranking': [1],
-        'cp_llenado': [800],
-        'cp_llenado_score': [85.2],
-        'cp_inestabilidad': [1500],
-        'cp_inestabilidad_score': [65.1],
-        'cp_tasa_cambio': [50000],
-        'cp_tasa_cambio_score': [70.3],
-        'hdd_uso': [45.2],
-        'hdd_uso_score': [80.0],
-        'hdd_inestabilidad': [8000],
-        'hdd_inestabilidad_score': [55.5],
-        'hdd_tasa_cambio': [120000],
-        'hdd_tasa_cambio_score': [60.2],
-        'registros_cp': [7],
-        'registros_hdd': [7],
-        'fecha_ejecucion': [datetime.now().strftime("%Y-%m-%d %H:%M:%S")]
-    })
-    
-    # Generar explicaciones
-    df_explanation = scoring_system.generate_explanation_columns(test_data)
-    
-    if not df_explanation.empty:
-        row = df_explanation.iloc[0]
-        print(f"   Equipo: {row['equipo']}")
-        print(f"   Categoría: {row['categoria_final']}")
-        print(f"   Explicación: {row['explicacion_detallada']}")
-        print(f"   Recomendación: {row['recomendaciones']}")
-        print("✅ Prueba de explicaciones completada\n")
-    else:
-        print("   ❌ Error: No se pudieron generar explicaciones\n")
+    with _Buf() as buf:
+        buf.emit("🧪 PRUEBA 4: Generación de Explicaciones")
+        buf.emit("-" * 50)
+        
+        scoring_system = _get_scorer()
+        
+        # Crear datos de prueba con puntuaciones (un registro + esquema de tipos explícito)
+        record = {
+            'equipo': 'Equipo_Test',
+            'area_cp': 'AREA_TEST',
+            'unidades_hdd': ('C:', 'D:'),
+            'puntuacion_final': 75.5,
+            'posicion_ranking': 1,
+            'cp_llenado': 800,
+            'cp_llenado_score': 85.2,
+            'cp_inestabilidad': 1500,
+            'cp_inestabilidad_score': 65.1,
+            'cp_tasa_cambio': 50000,
+            'cp_tasa_cambio_score': 70.3,
+            'hdd_uso': 45.2,
+            'hdd_uso_score': 80.0,
+            'hdd_inestabilidad': 8000,
+            'hdd_inestabilidad_score': 55.5,
+            'hdd_tasa_cambio': 120000,
+            'hdd_tasa_cambio_score': 60.2,
+            'registros_cp': 7,
+            'registros_hdd': 7,
+            'fecha_ejecucion': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        test_data = pd.DataFrame.from_records([record]).astype({
+            'puntuacion_final': 'float32',
+            'posicion_ranking': 'int16',
+            'cp_llenado': 'int32',
+            'cp_llenado_score': 'float32',
+            'cp_inestabilidad': 'int32',
+            'cp_inestabilidad_score': 'float32',
+            'cp_tasa_cambio': 'int32',
+            'cp_tasa_cambio_score': 'float32',
+            'hdd_uso': 'float32',
+            'hdd_uso_score': 'float32',
+            'hdd_inestabilidad': 'int32',
+            'hdd_inestabilidad_score': 'float32',
+            'hdd_tasa_cambio': 'int32',
+            'hdd_tasa_cambio_score': 'float32',
+            'registros_cp': 'int16',
+            'registros_hdd': 'int16',
+        })
+        
+        # Generar explicaciones
+        df_explanation = scoring_system.generate_explanation_columns(test_data)
+        
+        if not df_explanation.empty:
+            row = df_explanation.iloc[0]
+            buf.emit(f"   Equipo: {row['equipo']}")
+            buf.emit(f"   Categoría: {row['categoria_final']}")
+            buf.emit(f"   Explicación: {row['explicacion_detallada']}")
+            buf.emit(f"   Recomendación: {row['recomendaciones']}")
+            
+            # Procesar en bloque para ejercitar el camino vectorizado
+            df_lote = scoring_system.generate_explanation_columns(pd.concat([test_data] * 1000, ignore_index=True))
+            iguales = (df_lote['explicacion_detallada'] == row['explicacion_detallada']).all()
+            buf.emit(f"   Lote de {len(df_lote)} filas: {'✅ consistente' if iguales else '❌ inconsistente'}")
+            buf.emit("✅ Prueba de explicaciones completada\n")
+        else:
+            buf.emit("   ❌ Error: No se pudieron generar explicaciones\n")
 
 def test_database_operations():
     """
     Prueba las operaciones de base de datos.
     """
-    print("🧪 PRUEBA 5: Operaciones de Base de Datos")
-    print("-" * 50)
-    
-    try:
-        # Importar componentes de base de datos
-        import sys
-        sys.path.append('cp_data_analysis_v2/src')
-        from cp_db_manager import get_db_manager
+    with _Buf() as buf:
+        buf.emit("🧪 PRUEBA 5: Operaciones de Base de Datos")
+        buf.emit("-" * 50)
         
-        db_manager = get_db_manager()
-        
-        if db_manager.is_connected:
-            print("   ✅ Conexión a base de datos exitosa")
+        try:
+            # Importar componentes de base de datos
+            from cp_db_manager import get_db_manager
             
-            # Verificar si existe la tabla
-            check_table_query = """
-            SELECT COUNT(*) as table_exists
-            FROM INFORMATION_SCHEMA.TABLES 
-            WHERE TABLE_NAME = 'nv_unified_scoring'
-            """
+            db_manager = get_db_manager()
             
-            result = db_manager.execute_query(check_table_query)
-            if result and result[0]['table_exists'] > 0:
-                print("   ✅ Tabla nv_unified_scoring existe")
+            if db_manager.is_connected:
+                buf.emit("   ✅ Conexión a base de datos exitosa")
                 
-                # Contar registros
-                count_query = "SELECT COUNT(*) as total FROM nv_unified_scoring"
-                count_result = db_manager.execute_query(count_query)
-                if count_result:
-                    total_records = count_result[0]['total']
-                    print(f"   📊 Total de registros: {total_records}")
+                # Verificar la tabla y contar registros en una sola consulta (-1 = no existe).
+                # El conteo sale de sys.partitions para no referenciar una tabla que
+                # podría no existir (SQL Server falla al compilar la consulta en ese caso).
+                table_query = """
+                SELECT COALESCE((
+                    SELECT SUM(p.rows)
+                    FROM sys.partitions p
+                    WHERE p.object_id = OBJECT_ID('nv_unified_scoring')
+                      AND p.index_id IN (0, 1)
+                ), -1) AS total
+                """
+                
+                result = db_manager.execute_query(table_query)
+                if result and result[0]['total'] >= 0:
+                    buf.emit("   ✅ Tabla nv_unified_scoring existe")
+                    buf.emit(f"   📊 Total de registros: {result[0]['total']}")
+                else:
+                    buf.emit("   ⚠️  Tabla nv_unified_scoring no existe (se creará al ejecutar el sistema)")
             else:
-                print("   ⚠️  Tabla nv_unified_scoring no existe (se creará al ejecutar el sistema)")
-        else:
-            print("   ❌ Error: No se pudo conectar a la base de datos")
-    
-    except Exception as e:
-        print(f"   ❌ Error en operaciones de base de datos: {str(e)}")
-    
-    print("✅ Prueba de base de datos completada\n")
+                buf.emit("   ❌ Error: No se pudo conectar a la base de datos")
+        
+        except Exception as e:
+            buf.emit(f"   ❌ Error en operaciones de base de datos: {str(e)}")
+        
+        buf.emit("✅ Prueba de base de datos completada\n")
 
 def test_imports():
     """
     Prueba las importaciones necesarias.
     """
-    print("🧪 PRUEBA 6: Importaciones")
-    print("-" * 50)
-    
-    try:
-        # Probar importación del sistema principal
-        from unified_scoring_system import UnifiedScoringSystem
-        print("   ✅ unified_scoring_system importado correctamente")
-        
-        # Probar importación del visualizador
-        from show_unified_results import get_latest_results
-        print("   ✅ show_unified_results importado correctamente")
+    with _Buf() as buf:
+        buf.emit("🧪 PRUEBA 6: Importaciones")
+        buf.emit("-" * 50)
         
-        # Probar importaciones de CP
-        import sys
-        sys.path.append('cp_data_analysis_v2/src')
         try:
-            from cp_upload_data_deploy import upload_data_sql
-            print("   ✅ Componentes CP importados correctamente")
-        except ImportError as e:
-            print(f"   ⚠️  Componentes CP no disponibles: {str(e)}")
-        
-        # Probar importaciones de HDD
-        sys.path.append('hdd_data_analysis_v2/src')
-        try:
-            from hdd_upload_data_deploy import upload_data_sql
-            print("   ✅ Componentes HDD importados correctamente")
+            # Probar importación del sistema principal
+            if _IMPORT_ERROR is not None:
+                raise _IMPORT_ERROR
+            buf.emit("   ✅ unified_scoring_system importado correctamente")
+            
+            # Probar importación del visualizador
+            from show_unified_results import get_latest_results
+            buf.emit("   ✅ show_unified_results importado correctamente")
+            
+            # Probar importaciones de CP
+            try:
+                from cp_upload_data_deploy import upload_data_sql
+                buf.emit("   ✅ Componentes CP importados correctamente")
+            except ImportError as e:
+                buf.emit(f"   ⚠️  Componentes CP no disponibles: {str(e)}")
+            
+            # Probar importaciones de HDD
+            try:
+                from hdd_upload_data_deploy import upload_data_sql
+                buf.emit("   ✅ Componentes HDD importados correctamente")
+            except ImportError as e:
+                buf.emit(f"   ⚠️  Componentes HDD no disponibles: {str(e)}")
+            
         except ImportError as e:
-            print(f"   ⚠️  Componentes HDD no disponibles: {str(e)}")
+            buf.emit(f"   ❌ Error de importación: {str(e)}")
         
-    except ImportError as e:
-        print(f"   ❌ Error de importación: {str(e)}")
+        buf.emit("✅ Prueba de importaciones completada\n")
+
+class _ThreadLocalStdout:
+    """
+    Redirige stdout a un buffer propio por hilo (si existe) para que las pruebas
+    en paralelo no mezclen su salida.
+    """
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+    
+    def capture(self):
+        self._local.buffer = io.StringIO()
+    
+    def release(self):
+        buffer = self._local.buffer
+        self._local.buffer = None
+        return buffer.getvalue()
+    
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer or self._stream).write(text)
     
-    print("✅ Prueba de importaciones completada\n")
+    def flush(self):
+        self._stream.flush()
 
-def run_all_tests():
+def _run_captured(stdout, test_func):
     """
-    Ejecuta todas las pruebas.
+    Ejecuta una prueba capturando su salida.
+    
+    Returns:
+        tuple: (salida de la prueba, excepción o None)
+    """
+    stdout.capture()
+    try:
+        test_func()
+        error = None
+    except Exception as e:
+        error = e
+    return stdout.release(), error
+
+# Pruebas disponibles, en el orden en que se ejecutan y muestran
+TESTS = {
+    'imports': test_imports,
+    'percentile': test_percentile_calculation,
+    'configs': test_metric_configs,
+    'scoring': test_scoring_calculation,
+    'explanation': test_explanation_generation,
+    'db': test_database_operations,
+}
+
+# Pruebas que usan la instancia compartida de UnifiedScoringSystem
+SCORER_TESTS = {'percentile', 'configs', 'scoring', 'explanation'}
+
+def run_all_tests(only=None, repeat=1):
+    """
+    Ejecuta las pruebas (en paralelo, mostrando la salida en orden).
+    
+    Args:
+        only: Nombres de las pruebas a ejecutar (claves de TESTS); None = todas
+        repeat: Número de veces que se ejecuta el conjunto seleccionado
     """
     print("🚀 INICIANDO PRUEBAS DEL SISTEMA DE PUNTUACIÓN UNIFICADO")
     print("=" * 80)
     
-    try:
-        # Ejecutar pruebas
-        test_imports()
-        test_percentile_calculation()
-        test_metric_configs()
-        test_scoring_calculation()
-        test_explanation_generation()
-        test_database_operations()
-        
-        print("🎉 TODAS LAS PRUEBAS COMPLETADAS")
-        print("=" * 80)
-        print("✅ El sistema está listo para usar")
-        print("\n📋 Próximos pasos:")
-        print("   1. Ejecutar: python unified_scoring_system.py")
-        print("   2. Visualizar: python show_unified_results.py")
-        print("   3. Consultar documentación: README_UNIFIED_SCORING.md")
+    selected = [name for name in TESTS if only is None or name in only]
+    tests = [TESTS[name] for name in selected]
+    
+    # Crear el sistema compartido antes de lanzar los hilos (solo si se usa)
+    usa_scorer = bool(SCORER_TESTS.intersection(selected))
+    if usa_scorer:
+        _get_scorer()
+    
+    for iteration in range(repeat):
+        # Aislar cada iteración sin reconstruir el sistema (antes de lanzar los hilos)
+        if usa_scorer:
+            _get_scorer().reset_state()
         
-    except Exception as e:
-        print(f"❌ Error durante las pruebas: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        start = time.perf_counter()
+        stdout = _ThreadLocalStdout(sys.stdout)
+        sys.stdout = stdout
+        try:
+            with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+                futures = [executor.submit(_run_captured, stdout, test) for test in tests]
+                results = [future.result() for future in futures]
+        finally:
+            sys.stdout = stdout._stream
+        
+        # Mostrar la salida de cada prueba en el orden declarado
+        errors = []
+        for output, error in results:
+            sys.stdout.write(output)
+            if error is not None:
+                errors.append(error)
+        
+        if repeat > 1:
+            print(f"⏱️  Iteración {iteration + 1}/{repeat}: {time.perf_counter() - start:.3f}s\n")
+        
+        if errors:
+            for error in errors:
+                print(f"❌ Error durante las pruebas: {str(error)}")
+                print(''.join(traceback.format_exception(type(error), error, error.__traceback__)))
+            return
+    
+    print("🎉 TODAS LAS PRUEBAS COMPLETADAS")
+    print("=" * 80)
+    print("✅ El sistema está listo para usar")
+    print("\n📋 Próximos pasos:")
+    print("   1. Ejecutar: python unified_scoring_system.py")
+    print("   2. Visualizar: python show_unified_results.py")
+    print("   3. Consultar documentación: README_UNIFIED_SCORING.md")
 
 if __name__ == "__main__":
-    run_all_tests() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Pruebas del sistema de puntuación unificado")
+    parser.add_argument('--only', nargs='+', choices=list(TESTS), help="Ejecutar solo estas pruebas")
+    parser.add_argument('--repeat', type=int, default=1, help="Repetir las pruebas N veces (micro-benchmark)")
+    args = parser.parse_args()
+    
+    run_all_tests(only=args.only, repeat=max(1, args.repeat))
@@ -17,13 +17,118 @@ import warnings
 warnings.filterwarnings('ignore')
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 import uuid
 import logging
+import math
+import multiprocessing
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple, Optional
 
+try:
+    from numba import njit
+except ImportError:
+    # numba es opcional: sin él el kernel se ejecuta como Python normal
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
 logger = logging.getLogger('unified_scoring')
 
+# Columnas de nv_unified_scoring escritas por save_results_to_database (en orden)
+COLUMNAS_INSERT = (
+    'id', 'equipo', 'area_cp', 'unidades_hdd', 'puntuacion_final', 'posicion_ranking',
+    'categoria_final', 'cp_llenado', 'cp_llenado_score', 'cp_inestabilidad', 'cp_inestabilidad_score',
+    'cp_tasa_cambio', 'cp_tasa_cambio_score', 'hdd_uso', 'hdd_uso_score', 'hdd_inestabilidad',
+    'hdd_inestabilidad_score', 'hdd_tasa_cambio', 'hdd_tasa_cambio_score',
+    'explicacion_detallada', 'recomendaciones', 'registros_cp', 'registros_hdd', 'fecha_ejecucion'
+)
+INSERT_BATCH_SIZE = 500
+
+# Tramos de la puntuación final y su categoría
+CATEGORIA_BINS = (-np.inf, 25, 50, 75, 90, np.inf)
+CATEGORIA_LABELS = ('Necesita Mejora', 'Regular', 'Bueno', 'Muy Bueno', 'Excelente')
+
+# Métricas usadas en las explicaciones: (columna, etiqueta, recomendación si puntúa < 50)
+EXPLANATION_METRICS = (
+    ('cp_llenado', 'CP Llenado', 'Mejorar ocupación CP'),
+    ('cp_inestabilidad', 'CP Estabilidad', 'Reducir variabilidad CP'),
+    ('cp_tasa_cambio', 'CP Cambios', 'Estabilizar cambios CP'),
+    ('hdd_uso', 'HDD Uso', 'Optimizar uso HDD'),
+    ('hdd_inestabilidad', 'HDD Estabilidad', 'Reducir variabilidad HDD'),
+    ('hdd_tasa_cambio', 'HDD Cambios', 'Estabilizar cambios HDD'),
+)
+
+@njit(cache=True)
+def _percentile_kernel(value, sorted_values, higher_better):
+    """
+    Percentil de value (proporción de valores estrictamente menores) por búsqueda binaria.
+    
+    Args:
+        value: Valor del equipo
+        sorted_values: Array float64 ordenado de valores de referencia
+        higher_better: True si mayor valor = mejor rendimiento
+        
+    Returns:
+        float: Puntuación de 0 a 100
+    """
+    n = sorted_values.shape[0]
+    lo, hi = 0, n
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if sorted_values[mid] < value:
+            lo = mid + 1
+        else:
+            hi = mid
+    percentile = 100.0 * lo / n
+    return percentile if higher_better else 100.0 - percentile
+
+def format_unidades_hdd(unidades) -> str:
+    """
+    Convierte las unidades HDD (tupla, lista o texto ya unido) al texto "C:,D:".
+    
+    Args:
+        unidades: Unidades HDD del equipo
+        
+    Returns:
+        str: Unidades separadas por coma ('' si no hay)
+    """
+    if isinstance(unidades, str):
+        return unidades
+    if unidades is None or (isinstance(unidades, float) and np.isnan(unidades)):
+        return ''
+    return ','.join(unidades)
+
+def split_unidades_hdd(unidades) -> Tuple[str, ...]:
+    """
+    Devuelve las unidades HDD como tupla, aceptando tupla, lista o texto "C:,D:".
+    
+    Args:
+        unidades: Unidades HDD del equipo
+        
+    Returns:
+        Tuple[str, ...]: Unidades HDD
+    """
+    texto = format_unidades_hdd(unidades)
+    return tuple(texto.split(',')) if texto else ()
+
+def _cp_metrics_one(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Métricas CP de un frame combinado (uno o varios orígenes).
+    
+    Función de módulo para poder enviarla a un multiprocessing.Pool.
+    
+    Args:
+        df: Registros preparados por UnifiedScoringSystem._combine_sources
+        
+    Returns:
+        DataFrame indexado por (fuente, equipo) con métricas y área
+    """
+    return UnifiedScoringSystem._aggregate_metrics(df, ['fuente', 'equipo'], 'valor', primeras=('area',))
+
+
 class UnifiedScoringSystem:
     """
     Sistema de puntuación unificado que combina métricas de CP y HDD.
@@ -33,6 +138,9 @@ class UnifiedScoringSystem:
         """Inicializar el sistema de puntuación."""
         self.fecha_ejecucion = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
+        # Último conjunto de valores de referencia ordenado (ver _get_sorted_values)
+        self._sorted_cache = None
+        
         # Configuración de métricas y sus contextos
         self.metric_configs = {
             # Variables CP - Mayor valor = Mejor rendimiento
@@ -71,28 +179,71 @@ class UnifiedScoringSystem:
         }
         
         # Verificar que los pesos sumen 1.0
-        total_weight = sum(config['weight'] for config in self.metric_configs.values())
+        total_weight = math.fsum(config['weight'] for config in self.metric_configs.values())
         if abs(total_weight - 1.0) > 0.001:
             raise ValueError(f"Los pesos de las métricas deben sumar 1.0, actual: {total_weight}")
     
-    def calculate_percentile_score(self, value: float, all_values: List[float], 
-                                 direction: str = 'higher_better') -> float:
+    def reset_state(self):
         """
-        Calcula la puntuación basada en percentiles.
+        Restablece el estado por ejecución (fecha y cachés) sin reconstruir la configuración.
+        """
+        self.fecha_ejecucion = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._sorted_cache = None
+    
+    def _get_sorted_values(self, all_values) -> np.ndarray:
+        """
+        Devuelve los valores de referencia ordenados, reutilizando el último orden
+        calculado si se pasa de nuevo la misma colección.
         
         Args:
-            value: Valor del equipo
+            all_values: Lista o array de valores de referencia
+            
+        Returns:
+            np.ndarray: Valores ordenados (float64)
+        """
+        cache = self._sorted_cache
+        if cache is not None and cache[0] is all_values and cache[1] == len(all_values):
+            return cache[2]
+        
+        sorted_values = np.sort(np.ascontiguousarray(all_values, dtype=np.float64))
+        self._sorted_cache = (all_values, len(all_values), sorted_values)
+        return sorted_values
+    
+    def calculate_percentile_scores(self, values, all_values: List[float],
+                                    direction: str = 'higher_better') -> np.ndarray:
+        """
+        Calcula en bloque las puntuaciones por percentiles de varios valores.
+        
+        Args:
+            values: Valores a puntuar
             all_values: Lista de todos los valores para calcular percentiles
             direction: 'higher_better' o 'lower_better'
             
         Returns:
-            float: Puntuación de 0 a 100
+            np.ndarray: Puntuaciones de 0 a 100
         """
-        if not all_values or len(all_values) < 2:
-            return 50.0  # Puntuación neutral si no hay suficientes datos
+        values = np.asarray(values, dtype=np.float64)
+        if all_values is None or len(all_values) < 2:
+            return np.full(values.shape, 50.0)  # Puntuación neutral si no hay suficientes datos
         
-        # Calcular percentil
-        percentile = (sum(1 for x in all_values if x < value) / len(all_values)) * 100
+        return self._score_sorted(values, self._get_sorted_values(all_values), direction)
+    
+    @staticmethod
+    def _score_sorted(values: np.ndarray, sorted_values: np.ndarray, direction: str) -> np.ndarray:
+        """
+        Puntúa valores contra un array de referencia ya ordenado.
+        
+        Args:
+            values: Valores a puntuar (float64)
+            sorted_values: Valores de referencia ordenados (al menos 2)
+            direction: 'higher_better' o 'lower_better'
+            
+        Returns:
+            np.ndarray: Puntuaciones de 0 a 100
+        """
+        # Percentil = proporción de valores estrictamente menores (búsqueda binaria)
+        rank = np.searchsorted(sorted_values, values, side='left')
+        percentile = np.where(np.isnan(values), 0.0, rank / len(sorted_values) * 100)
         
         # Ajustar según la dirección
         if direction == 'lower_better':
@@ -101,6 +252,27 @@ class UnifiedScoringSystem:
         
         return percentile
     
+    def calculate_percentile_score(self, value: float, all_values: List[float], 
+                                 direction: str = 'higher_better') -> float:
+        """
+        Calcula la puntuación basada en percentiles.
+        
+        Args:
+            value: Valor del equipo
+            all_values: Lista de todos los valores para calcular percentiles
+            direction: 'higher_better' o 'lower_better'
+            
+        Returns:
+            float: Puntuación de 0 a 100
+        """
+        if all_values is None or len(all_values) < 2:
+            return 50.0  # Puntuación neutral si no hay suficientes datos
+        
+        # Valor suelto: búsqueda binaria compilada, sin pasar por arrays de un elemento
+        value = np.nan if value is None else float(value)
+        return float(_percentile_kernel(value, self._get_sorted_values(all_values),
+                                        direction != 'lower_better'))
+    
     def get_cp_data(self) -> Dict[str, pd.DataFrame]:
         """
         Obtiene datos de CP desde la base de datos.
@@ -155,88 +327,144 @@ class UnifiedScoringSystem:
             logger.error(f"Error obteniendo datos HDD: {str(e)}")
             return {}
     
-    def calculate_cp_metrics(self, cp_data: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    @staticmethod
+    def _combine_sources(data: Dict[str, pd.DataFrame], required_cols: set,
+                         columna_valor: str, claves: Tuple[str, ...]) -> pd.DataFrame:
+        """
+        Une todos los DataFrames de origen y los prepara para la agregación.
+        
+        Las fechas y valores se parsean una sola vez sobre el frame combinado.
+        La columna 'fuente' conserva el DataFrame de origen, de modo que la
+        ventana de 7 días y las agrupaciones siguen siendo por origen.
+        
+        Args:
+            data: DataFrames de origen por nombre
+            required_cols: Columnas que debe tener cada DataFrame
+            columna_valor: Columna numérica a analizar
+            claves: Columnas de agrupación (además de 'fuente')
+            
+        Returns:
+            DataFrame combinado con los registros de los últimos 7 días
+        """
+        # Se validan todas las columnas requeridas pero solo se combinan las que se usan
+        # (codigo y actualizacion no intervienen en las métricas)
+        columnas = ['fecha', columna_valor, *claves]
+        frames = {
+            nombre: df[columnas]
+            for nombre, df in data.items()
+            if not df.empty and required_cols.issubset(df.columns)
+        }
+        if not frames:
+            return pd.DataFrame()
+        
+        # assign crea únicamente las columnas parseadas
+        df = pd.concat(frames, names=['fuente', None]).reset_index(level='fuente')
+        df = df.assign(**{
+            'fecha': pd.to_datetime(df['fecha'], errors='coerce'),
+            columna_valor: pd.to_numeric(df[columna_valor], errors='coerce'),
+        }).dropna(subset=['fecha', columna_valor])
+        
+        # Claves de agrupación como categóricas (comparaciones sobre códigos enteros);
+        # 'fuente' conserva el orden de los orígenes
+        df['fuente'] = pd.Categorical(df['fuente'], categories=list(frames))
+        for col in claves:
+            df[col] = df[col].astype('category')
+        
+        # Filtrar últimos 7 días respecto a la fecha máxima de cada origen: ordenado por
+        # (fuente, fecha) cada origen es un bloque contiguo y su ventana es la cola del bloque
+        df = df.sort_values(['fuente', 'fecha'], kind='stable')
+        codigos = df['fuente'].cat.codes.to_numpy()
+        fechas = df['fecha'].to_numpy()
+        limites = np.searchsorted(codigos, np.arange(len(frames) + 1))
+        tramos = []
+        for inicio, fin in zip(limites[:-1], limites[1:]):
+            if fin > inicio:
+                corte = fechas[fin - 1] - np.timedelta64(7, 'D')
+                tramos.append(np.arange(inicio + np.searchsorted(fechas[inicio:fin], corte, side='left'), fin))
+        return df.iloc[np.concatenate(tramos)] if tramos else df.iloc[:0]
+    
+    @staticmethod
+    def _aggregate_metrics(df: pd.DataFrame, claves: List[str], columna_valor: str,
+                           primeras: Tuple[str, ...] = ()) -> pd.DataFrame:
+        """
+        Agrega media, desviación y tasa de cambio por grupo en una sola pasada.
+        
+        Args:
+            df: Registros combinados (ver _combine_sources)
+            claves: Columnas de agrupación
+            columna_valor: Columna numérica a analizar
+            primeras: Columnas descriptivas de las que se toma el primer valor por grupo
+            
+        Returns:
+            DataFrame indexado por claves con media, inestabilidad, tasa_cambio,
+            registros y las columnas de primeras (solo grupos con al menos 3 registros)
+        """
+        grupos = df.groupby(claves, observed=True, sort=False)
+        metricas = grupos.agg(
+            media=(columna_valor, 'mean'),
+            registros=(columna_valor, 'size'),
+            **{col: (col, 'first') for col in primeras},
+        )
+        # Desviación poblacional (ddof=0), igual que np.std
+        metricas['inestabilidad'] = grupos[columna_valor].std(ddof=0) * 1000  # Factor de escala
+        metricas = metricas[metricas['registros'] >= 3]  # Mínimo 3 registros
+        metricas['registros'] = metricas['registros'].astype(np.int32)  # Columna INT en BD
+        
+        # Calcular tasa de cambio (los pasos con valor previo 0 dan ±inf/NaN y se excluyen)
+        df_ordenado = df.sort_values(claves + ['fecha'], kind='stable')
+        grupos_ordenados = df_ordenado.groupby(claves, observed=True)[columna_valor]
+        tasas = grupos_ordenados.pct_change().replace([np.inf, -np.inf], np.nan) * 100
+        tasa_cambio = tasas.groupby([df_ordenado[c] for c in claves], observed=True).std(ddof=0)
+        metricas['tasa_cambio'] = tasa_cambio.reindex(metricas.index).fillna(0) * 10000
+        
+        return metricas
+    
+    def calculate_cp_metrics(self, cp_data: Dict[str, pd.DataFrame],
+                             processes: Optional[int] = None) -> pd.DataFrame:
         """
         Calcula las métricas de CP para cada equipo.
         
         Args:
             cp_data: Datos de CP
+            processes: Procesos para repartir los orígenes (None o 1 = en proceso)
             
         Returns:
             DataFrame con métricas calculadas
         """
         logger.info("Calculando métricas CP...")
         
-        all_equipos_data = []
-        
-        for nombre_df, df in cp_data.items():
-            try:
-                if df.empty:
-                    continue
-                
-                # Verificar columnas requeridas
-                required_cols = {'codigo', 'fecha', 'equipo', 'area', 'valor', 'actualizacion'}
-                if not required_cols.issubset(df.columns):
-                    continue
-                
-                # Crear copia y procesar
-                df = df.copy()
-                df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
-                df['valor'] = pd.to_numeric(df['valor'], errors='coerce')
-                df = df.dropna(subset=['fecha', 'valor'])
-                
-                if df.empty:
-                    continue
-                
-                # Filtrar últimos 7 días
-                fecha_maxima = df['fecha'].max()
-                df_ultimos_7_dias = df[df['fecha'] >= fecha_maxima - timedelta(days=7)]
-                
-                if df_ultimos_7_dias.empty:
-                    continue
-                
-                # Calcular métricas por equipo
-                for equipo in df_ultimos_7_dias['equipo'].unique():
-                    df_equipo = df_ultimos_7_dias[df_ultimos_7_dias['equipo'] == equipo]
-                    
-                    if len(df_equipo) < 3:  # Mínimo 3 registros
-                        continue
-                    
-                    valores = df_equipo['valor'].tolist()
-                    
-                    # Calcular métricas
-                    llenado = np.mean(valores)
-                    inestabilidad = np.std(valores) * 1000  # Factor de escala
-                    
-                    # Calcular tasa de cambio
-                    df_equipo_sorted = df_equipo.sort_values('fecha')
-                    tasas_cambio = []
-                    for i in range(1, len(df_equipo_sorted)):
-                        if df_equipo_sorted.iloc[i-1]['valor'] != 0:
-                            tasa = ((df_equipo_sorted.iloc[i]['valor'] - df_equipo_sorted.iloc[i-1]['valor']) / 
-                                   df_equipo_sorted.iloc[i-1]['valor']) * 100
-                            tasas_cambio.append(tasa)
-                    
-                    tasa_cambio = np.std(tasas_cambio) * 10000 if tasas_cambio else 0
-                    
-                    all_equipos_data.append({
-                        'equipo': equipo,
-                        'area': df_equipo['area'].iloc[0],
-                        'cp_llenado': llenado,
-                        'cp_inestabilidad': inestabilidad,
-                        'cp_tasa_cambio': tasa_cambio,
-                        'registros_cp': len(df_equipo)
-                    })
-                    
-            except Exception as e:
-                logger.error(f"Error procesando DataFrame CP '{nombre_df}': {str(e)}")
-                continue
+        try:
+            required_cols = {'codigo', 'fecha', 'equipo', 'area', 'valor', 'actualizacion'}
+            df = self._combine_sources(cp_data, required_cols, 'valor', ('equipo', 'area'))
+            
+            if df.empty:
+                logger.warning("No se pudieron calcular métricas CP")
+                return pd.DataFrame()
+            
+            # Calcular métricas por equipo: una sola agregación, o un frame por origen
+            # repartido entre procesos cuando se pide (orígenes independientes)
+            if processes and processes > 1 and df['fuente'].nunique() > 1:
+                frames = [grupo for _, grupo in df.groupby('fuente', observed=True, sort=False)]
+                with multiprocessing.Pool(processes) as pool:
+                    metricas = pd.concat(pool.map(_cp_metrics_one, frames))
+            else:
+                metricas = _cp_metrics_one(df)
+            
+        except Exception as e:
+            logger.error(f"Error procesando datos CP: {str(e)}")
+            return pd.DataFrame()
         
-        if not all_equipos_data:
+        if metricas.empty:
             logger.warning("No se pudieron calcular métricas CP")
             return pd.DataFrame()
         
-        return pd.DataFrame(all_equipos_data)
+        resultado = metricas.reset_index().rename(columns={
+            'media': 'cp_llenado',
+            'inestabilidad': 'cp_inestabilidad',
+            'tasa_cambio': 'cp_tasa_cambio',
+            'registros': 'registros_cp',
+        })
+        return resultado[['equipo', 'area', 'cp_llenado', 'cp_inestabilidad', 'cp_tasa_cambio', 'registros_cp']]
     
     def calculate_hdd_metrics(self, hdd_data: Dict[str, pd.DataFrame]) -> pd.DataFrame:
         """
@@ -250,79 +478,33 @@ class UnifiedScoringSystem:
         """
         logger.info("Calculando métricas HDD...")
         
-        all_equipos_data = []
-        
-        for nombre_df, df in hdd_data.items():
-            try:
-                if df.empty:
-                    continue
-                
-                # Verificar columnas requeridas
-                required_cols = {'codigo', 'fecha', 'equipo', 'unidad', 'uso'}
-                if not required_cols.issubset(df.columns):
-                    continue
-                
-                # Crear copia y procesar
-                df = df.copy()
-                df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
-                df['uso'] = pd.to_numeric(df['uso'], errors='coerce')
-                df = df.dropna(subset=['fecha', 'uso'])
-                
-                if df.empty:
-                    continue
-                
-                # Filtrar últimos 7 días
-                fecha_maxima = df['fecha'].max()
-                df_ultimos_7_dias = df[df['fecha'] >= fecha_maxima - timedelta(days=7)]
-                
-                if df_ultimos_7_dias.empty:
-                    continue
-                
-                # Calcular métricas por equipo-unidad
-                for (equipo, unidad) in df_ultimos_7_dias.groupby(['equipo', 'unidad']).groups.keys():
-                    df_equipo_unidad = df_ultimos_7_dias[
-                        (df_ultimos_7_dias['equipo'] == equipo) & 
-                        (df_ultimos_7_dias['unidad'] == unidad)
-                    ]
-                    
-                    if len(df_equipo_unidad) < 3:  # Mínimo 3 registros
-                        continue
-                    
-                    valores = df_equipo_unidad['uso'].tolist()
-                    
-                    # Calcular métricas
-                    uso = np.mean(valores) * 100  # Convertir a porcentaje
-                    inestabilidad = np.std(valores) * 1000  # Factor de escala
-                    
-                    # Calcular tasa de cambio
-                    df_equipo_unidad_sorted = df_equipo_unidad.sort_values('fecha')
-                    tasas_cambio = []
-                    for i in range(1, len(df_equipo_unidad_sorted)):
-                        if df_equipo_unidad_sorted.iloc[i-1]['uso'] != 0:
-                            tasa = ((df_equipo_unidad_sorted.iloc[i]['uso'] - df_equipo_unidad_sorted.iloc[i-1]['uso']) / 
-                                   df_equipo_unidad_sorted.iloc[i-1]['uso']) * 100
-                            tasas_cambio.append(tasa)
-                    
-                    tasa_cambio = np.std(tasas_cambio) * 10000 if tasas_cambio else 0
-                    
-                    all_equipos_data.append({
-                        'equipo': equipo,
-                        'unidad': unidad,
-                        'hdd_uso': uso,
-                        'hdd_inestabilidad': inestabilidad,
-                        'hdd_tasa_cambio': tasa_cambio,
-                        'registros_hdd': len(df_equipo_unidad)
-                    })
-                    
-            except Exception as e:
-                logger.error(f"Error procesando DataFrame HDD '{nombre_df}': {str(e)}")
-                continue
+        try:
+            required_cols = {'codigo', 'fecha', 'equipo', 'unidad', 'uso'}
+            df = self._combine_sources(hdd_data, required_cols, 'uso', ('equipo', 'unidad'))
+            
+            if df.empty:
+                logger.warning("No se pudieron calcular métricas HDD")
+                return pd.DataFrame()
+            
+            # Calcular métricas por equipo-unidad en una sola agregación
+            metricas = self._aggregate_metrics(df, ['fuente', 'equipo', 'unidad'], 'uso')
+            metricas['media'] *= 100  # Convertir a porcentaje
+            
+        except Exception as e:
+            logger.error(f"Error procesando datos HDD: {str(e)}")
+            return pd.DataFrame()
         
-        if not all_equipos_data:
+        if metricas.empty:
             logger.warning("No se pudieron calcular métricas HDD")
             return pd.DataFrame()
         
-        return pd.DataFrame(all_equipos_data)
+        resultado = metricas.reset_index().rename(columns={
+            'media': 'hdd_uso',
+            'inestabilidad': 'hdd_inestabilidad',
+            'tasa_cambio': 'hdd_tasa_cambio',
+            'registros': 'registros_hdd',
+        })
+        return resultado[['equipo', 'unidad', 'hdd_uso', 'hdd_inestabilidad', 'hdd_tasa_cambio', 'registros_hdd']]
     
     def calculate_unified_scores(self, cp_metrics: pd.DataFrame, hdd_metrics: pd.DataFrame, 
                                 require_both_sources: bool = True) -> pd.DataFrame:
@@ -344,112 +526,94 @@ class UnifiedScoringSystem:
             logger.warning("No hay datos de CP ni HDD para procesar")
             return pd.DataFrame()
         
-        # Crear DataFrame base con todos los equipos
-        equipos_cp = set(cp_metrics['equipo'].unique()) if not cp_metrics.empty else set()
-        equipos_hdd = set(hdd_metrics['equipo'].unique()) if not hdd_metrics.empty else set()
+        columnas_cp = ['cp_llenado', 'cp_inestabilidad', 'cp_tasa_cambio']
+        columnas_hdd = ['hdd_uso', 'hdd_inestabilidad', 'hdd_tasa_cambio']
         
+        # Una fila por equipo y fuente (promedio si hay múltiples áreas / unidades)
+        if not cp_metrics.empty:
+            cp_agg = cp_metrics.groupby('equipo', observed=True, sort=False).agg(
+                area_cp=('area', 'first'),
+                **{col: (col, 'mean') for col in columnas_cp},
+                registros_cp=('area', 'size'),
+            )
+        else:
+            cp_agg = pd.DataFrame(columns=['area_cp'] + columnas_cp + ['registros_cp'])
+        
+        if not hdd_metrics.empty:
+            grupos_hdd = hdd_metrics.groupby('equipo', observed=True, sort=False)
+            hdd_agg = grupos_hdd[columnas_hdd].mean()
+            hdd_agg.insert(0, 'unidades_hdd', (
+                hdd_metrics.drop_duplicates(['equipo', 'unidad'])
+                .groupby('equipo', observed=True, sort=False)['unidad'].agg(tuple)
+            ))
+            hdd_agg['registros_hdd'] = grupos_hdd.size()
+        else:
+            hdd_agg = pd.DataFrame(columns=['unidades_hdd'] + columnas_hdd + ['registros_hdd'])
+        
+        # Índices como objetos para unir claves categóricas con categorías distintas
+        cp_agg.index = cp_agg.index.astype(object)
+        hdd_agg.index = hdd_agg.index.astype(object)
+        
+        logger.info(f"Equipos CP: {len(cp_agg)}, Equipos HDD: {len(hdd_agg)}")
         if require_both_sources:
             # Solo equipos que tengan datos de AMBAS fuentes
-            todos_equipos = equipos_cp.intersection(equipos_hdd)
+            df_resultados = cp_agg.join(hdd_agg, how='inner')
             logger.info(f"Modo: Solo equipos con datos CP y HDD")
-            logger.info(f"Equipos CP: {len(equipos_cp)}, Equipos HDD: {len(equipos_hdd)}")
-            logger.info(f"Equipos con ambas fuentes: {len(todos_equipos)}")
+            logger.info(f"Equipos con ambas fuentes: {len(df_resultados)}")
         else:
             # Todos los equipos de cualquier fuente
-            todos_equipos = equipos_cp.union(equipos_hdd)
+            df_resultados = cp_agg.join(hdd_agg, how='outer')
             logger.info(f"Modo: Todos los equipos disponibles")
-            logger.info(f"Equipos CP: {len(equipos_cp)}, Equipos HDD: {len(equipos_hdd)}")
-            logger.info(f"Total equipos únicos: {len(todos_equipos)}")
+            logger.info(f"Total equipos únicos: {len(df_resultados)}")
         
-        if not todos_equipos:
+        if df_resultados.empty:
             logger.warning("No hay equipos que cumplan los criterios de inclusión")
             return pd.DataFrame()
         
-        resultados = []
+        # Orden por equipo: los empates de puntuación se resuelven igual en cada ejecución
+        df_resultados = df_resultados.sort_index()
+        df_resultados.index.name = 'equipo'
         
-        for equipo in todos_equipos:
-            # Obtener datos CP del equipo
-            cp_equipo = cp_metrics[cp_metrics['equipo'] == equipo] if not cp_metrics.empty else pd.DataFrame()
-            
-            # Obtener datos HDD del equipo
-            hdd_equipo = hdd_metrics[hdd_metrics['equipo'] == equipo] if not hdd_metrics.empty else pd.DataFrame()
-            
-            # Inicializar métricas
-            metricas_equipo = {
-                'equipo': equipo,
-                'area_cp': cp_equipo['area'].iloc[0] if not cp_equipo.empty else None,
-                'unidades_hdd': list(hdd_equipo['unidad'].unique()) if not hdd_equipo.empty else [],
-                'registros_cp': len(cp_equipo),
-                'registros_hdd': len(hdd_equipo)
-            }
-            
-            # Calcular métricas CP (promedio si hay múltiples áreas)
-            if not cp_equipo.empty:
-                metricas_equipo.update({
-                    'cp_llenado': cp_equipo['cp_llenado'].mean(),
-                    'cp_inestabilidad': cp_equipo['cp_inestabilidad'].mean(),
-                    'cp_tasa_cambio': cp_equipo['cp_tasa_cambio'].mean()
-                })
-            else:
-                metricas_equipo.update({
-                    'cp_llenado': None,
-                    'cp_inestabilidad': None,
-                    'cp_tasa_cambio': None
-                })
-            
-            # Calcular métricas HDD (promedio si hay múltiples unidades)
-            if not hdd_equipo.empty:
-                metricas_equipo.update({
-                    'hdd_uso': hdd_equipo['hdd_uso'].mean(),
-                    'hdd_inestabilidad': hdd_equipo['hdd_inestabilidad'].mean(),
-                    'hdd_tasa_cambio': hdd_equipo['hdd_tasa_cambio'].mean()
-                })
-            else:
-                metricas_equipo.update({
-                    'hdd_uso': None,
-                    'hdd_inestabilidad': None,
-                    'hdd_tasa_cambio': None
-                })
-            
-            resultados.append(metricas_equipo)
+        # Valores por defecto para equipos sin datos de una de las fuentes
+        df_resultados['unidades_hdd'] = [
+            u if isinstance(u, tuple) else () for u in df_resultados['unidades_hdd']
+        ]
+        for col in ('registros_cp', 'registros_hdd'):
+            df_resultados[col] = df_resultados[col].fillna(0).astype(np.int32)
+        df_resultados[columnas_cp + columnas_hdd] = df_resultados[columnas_cp + columnas_hdd].astype(np.float64)
         
-        df_resultados = pd.DataFrame(resultados)
+        df_resultados = df_resultados.reset_index()[
+            ['equipo', 'area_cp', 'unidades_hdd', 'registros_cp', 'registros_hdd'] + columnas_cp + columnas_hdd
+        ]
         
-        # Calcular puntuaciones por percentiles
+        # Calcular puntuaciones por percentiles (un rank por métrica)
         for metric_name, config in self.metric_configs.items():
             if metric_name in df_resultados.columns:
-                valores_validos = df_resultados[metric_name].dropna()
+                valores = df_resultados[metric_name]
+                n_validos = valores.count()
                 
-                if len(valores_validos) > 1:
-                    # Calcular puntuaciones por percentiles
-                    puntuaciones = []
-                    for _, row in df_resultados.iterrows():
-                        if pd.notna(row[metric_name]):
-                            score = self.calculate_percentile_score(
-                                row[metric_name], 
-                                valores_validos.tolist(), 
-                                config['direction']
-                            )
-                            puntuaciones.append(score)
-                        else:
-                            puntuaciones.append(50.0)  # Puntuación neutral para valores faltantes
-                    
-                    df_resultados[f'{metric_name}_score'] = puntuaciones
+                if n_validos > 1:
+                    # rank 'min' = 1 + valores estrictamente menores (misma regla que searchsorted 'left')
+                    percentil = (valores.rank(method='min') - 1) / n_validos * 100
+                    if config['direction'] == 'lower_better':
+                        percentil = 100 - percentil
+                    # Puntuación neutral para valores faltantes
+                    df_resultados[f'{metric_name}_score'] = percentil.fillna(50.0)
                 else:
                     # Si no hay suficientes datos, asignar puntuación neutral
                     df_resultados[f'{metric_name}_score'] = 50.0
         
-        # Calcular puntuación final ponderada
-        df_resultados['puntuacion_final'] = 0.0
-        
-        for metric_name, config in self.metric_configs.items():
-            score_col = f'{metric_name}_score'
-            if score_col in df_resultados.columns:
-                df_resultados['puntuacion_final'] += df_resultados[score_col] * config['weight']
+        # Calcular puntuación final ponderada (un único producto matriz-vector)
+        metricas_puntuadas = [m for m in self.metric_configs if f'{m}_score' in df_resultados.columns]
+        pesos = np.array([self.metric_configs[m]['weight'] for m in metricas_puntuadas], dtype=np.float64)
+        puntuaciones = df_resultados[[f'{m}_score' for m in metricas_puntuadas]].to_numpy(dtype=np.float64)
+        # Redondeo a 10 decimales: el orden de suma del producto no debe romper empates
+        df_resultados['puntuacion_final'] = np.round(puntuaciones @ pesos, 10)
         
         # Agregar información adicional para explicación
         df_resultados['fecha_ejecucion'] = self.fecha_ejecucion
-        df_resultados['id'] = [str(uuid.uuid4()) for _ in range(len(df_resultados))]
+        uuid4 = uuid.uuid4  # Enlace local: evita la búsqueda de atributo por fila
+        df_resultados['id'] = [str(uuid4()) for _ in range(len(df_resultados))]
         
         # Ordenar por puntuación final (descendente)
         df_resultados = df_resultados.sort_values('puntuacion_final', ascending=False)
@@ -472,77 +636,52 @@ class UnifiedScoringSystem:
         """
         logger.info("Generando columnas de explicación...")
         
-        df_explanation = df_scores.copy()
-        
-        # Función para categorizar puntuaciones
-        def categorize_score(score):
-            if score >= 90:
-                return "Excelente"
-            elif score >= 75:
-                return "Muy Bueno"
-            elif score >= 50:
-                return "Bueno"
-            elif score >= 25:
-                return "Regular"
-            else:
-                return "Necesita Mejora"
-        
-        # Categorizar puntuación final
-        df_explanation['categoria_final'] = df_explanation['puntuacion_final'].apply(categorize_score)
-        
-        # Generar explicación detallada
-        explicaciones = []
-        for _, row in df_explanation.iterrows():
-            explicacion_parts = []
-            
-            # Explicación CP
-            if pd.notna(row['cp_llenado']):
-                explicacion_parts.append(f"CP Llenado: {row['cp_llenado_score']:.1f}pts")
-            if pd.notna(row['cp_inestabilidad']):
-                explicacion_parts.append(f"CP Estabilidad: {row['cp_inestabilidad_score']:.1f}pts")
-            if pd.notna(row['cp_tasa_cambio']):
-                explicacion_parts.append(f"CP Cambios: {row['cp_tasa_cambio_score']:.1f}pts")
-            
-            # Explicación HDD
-            if pd.notna(row['hdd_uso']):
-                explicacion_parts.append(f"HDD Uso: {row['hdd_uso_score']:.1f}pts")
-            if pd.notna(row['hdd_inestabilidad']):
-                explicacion_parts.append(f"HDD Estabilidad: {row['hdd_inestabilidad_score']:.1f}pts")
-            if pd.notna(row['hdd_tasa_cambio']):
-                explicacion_parts.append(f"HDD Cambios: {row['hdd_tasa_cambio_score']:.1f}pts")
-            
-            explicacion = " | ".join(explicacion_parts)
-            explicaciones.append(explicacion)
-        
-        df_explanation['explicacion_detallada'] = explicaciones
-        
-        # Generar recomendaciones
-        recomendaciones = []
-        for _, row in df_explanation.iterrows():
-            recs = []
-            
-            # Recomendaciones basadas en métricas bajas
-            if pd.notna(row['cp_llenado']) and row['cp_llenado_score'] < 50:
-                recs.append("Mejorar ocupación CP")
-            if pd.notna(row['cp_inestabilidad']) and row['cp_inestabilidad_score'] < 50:
-                recs.append("Reducir variabilidad CP")
-            if pd.notna(row['cp_tasa_cambio']) and row['cp_tasa_cambio_score'] < 50:
-                recs.append("Estabilizar cambios CP")
-            if pd.notna(row['hdd_uso']) and row['hdd_uso_score'] < 50:
-                recs.append("Optimizar uso HDD")
-            if pd.notna(row['hdd_inestabilidad']) and row['hdd_inestabilidad_score'] < 50:
-                recs.append("Reducir variabilidad HDD")
-            if pd.notna(row['hdd_tasa_cambio']) and row['hdd_tasa_cambio_score'] < 50:
-                recs.append("Estabilizar cambios HDD")
-            
-            if not recs:
-                recs.append("Mantener rendimiento actual")
-            
-            recomendaciones.append("; ".join(recs))
-        
-        df_explanation['recomendaciones'] = recomendaciones
-        
-        return df_explanation
+        # Categorizar puntuación final (intervalos [a, b) por tramo)
+        categoria_final = pd.cut(
+            df_scores['puntuacion_final'],
+            bins=CATEGORIA_BINS,
+            labels=CATEGORIA_LABELS,
+            right=False
+        ).astype(object)
+        
+        # Generar explicación detallada y recomendaciones columna a columna
+        partes_explicacion = {}
+        partes_recomendacion = {}
+        for metric_name, etiqueta, recomendacion in EXPLANATION_METRICS:
+            con_dato = df_scores[metric_name].notna()
+            score = df_scores[f'{metric_name}_score']
+            
+            texto_score = score.map('{:.1f}'.format)
+            partes_explicacion[metric_name] = (etiqueta + ': ' + texto_score + 'pts').where(con_dato)
+            partes_recomendacion[metric_name] = pd.Series(recomendacion, index=df_scores.index).where(
+                con_dato & (score < 50)
+            )
+        
+        # assign devuelve un DataFrame nuevo sin copiar las columnas existentes
+        return df_scores.assign(
+            categoria_final=categoria_final,
+            explicacion_detallada=self._join_parts(pd.DataFrame(partes_explicacion), " | ", ""),
+            recomendaciones=self._join_parts(
+                pd.DataFrame(partes_recomendacion), "; ", "Mantener rendimiento actual"
+            ),
+        )
+    
+    @staticmethod
+    def _join_parts(partes: pd.DataFrame, separador: str, vacio: str) -> pd.Series:
+        """
+        Une por fila las partes no nulas de un DataFrame, conservando el orden de columnas.
+        
+        Args:
+            partes: DataFrame con una columna por parte (NaN = parte omitida)
+            separador: Separador entre partes
+            vacio: Texto para filas sin ninguna parte
+            
+        Returns:
+            pd.Series: Texto unido por fila
+        """
+        # Una sola pasada sobre el array de objetos; las partes omitidas quedan como ''
+        valores = partes.where(partes.notna(), '').to_numpy(dtype=object)
+        return pd.Series([separador.join(filter(None, fila)) or vacio for fila in valores], index=partes.index)
     
     def save_results_to_database(self, df_results: pd.DataFrame) -> bool:
         """
@@ -560,8 +699,12 @@ class UnifiedScoringSystem:
                 import sys
                 sys.path.append('cp_data_analysis_v2/src')
                 from cp_db_manager import get_db_manager
+                from sqlalchemy import text
                 
                 db_manager = get_db_manager()
+                if not db_manager.is_connected or db_manager.engine is None:
+                    logger.error("Error guardando en base de datos CP: sin conexión")
+                    return False
                 
                 # Crear tabla si no existe
                 create_table_sql = """
@@ -597,34 +740,42 @@ class UnifiedScoringSystem:
                 
                 db_manager.execute_query(create_table_sql)
                 
-                # Insertar datos
-                for _, row in df_results.iterrows():
-                    insert_sql = """
-                    INSERT INTO nv_unified_scoring (
-                        id, equipo, area_cp, unidades_hdd, puntuacion_final, posicion_ranking,
-                        categoria_final, cp_llenado, cp_llenado_score, cp_inestabilidad, cp_inestabilidad_score,
-                        cp_tasa_cambio, cp_tasa_cambio_score, hdd_uso, hdd_uso_score, hdd_inestabilidad,
-                        hdd_inestabilidad_score, hdd_tasa_cambio, hdd_tasa_cambio_score,
-                        explicacion_detallada, recomendaciones, registros_cp, registros_hdd, fecha_ejecucion
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """
-                    
-                    unidades_hdd_str = ','.join(row['unidades_hdd']) if row['unidades_hdd'] else None
-                    
-                    params = (
-                        row['id'], row['equipo'], row['area_cp'], unidades_hdd_str,
-                        row['puntuacion_final'], row['posicion_ranking'], row['categoria_final'],
-                        row['cp_llenado'], row.get('cp_llenado_score', None),
-                        row['cp_inestabilidad'], row.get('cp_inestabilidad_score', None),
-                        row['cp_tasa_cambio'], row.get('cp_tasa_cambio_score', None),
-                        row['hdd_uso'], row.get('hdd_uso_score', None),
-                        row['hdd_inestabilidad'], row.get('hdd_inestabilidad_score', None),
-                        row['hdd_tasa_cambio'], row.get('hdd_tasa_cambio_score', None),
-                        row['explicacion_detallada'], row['recomendaciones'],
-                        row['registros_cp'], row['registros_hdd'], row['fecha_ejecucion']
+                datos = df_results.reindex(columns=COLUMNAS_INSERT)
+                datos['unidades_hdd'] = datos['unidades_hdd'].map(lambda u: format_unidades_hdd(u) or None)
+                # Tipos nativos de Python y NaN -> NULL
+                datos = datos.astype(object).where(datos.notna(), None)
+                columnas_sql = ', '.join(COLUMNAS_INSERT)
+                
+                if db_manager.engine.dialect.driver == 'pyodbc':
+                    # SQL Server: fast_executemany envía cada lote como un único array de
+                    # parámetros en lugar de una sentencia por fila
+                    insert_sql = (
+                        f"INSERT INTO nv_unified_scoring ({columnas_sql}) "
+                        f"VALUES ({', '.join('?' * len(COLUMNAS_INSERT))})"
                     )
-                    
-                    db_manager.execute_query(insert_sql, params)
+                    filas = list(datos.itertuples(index=False, name=None))
+                    conexion = db_manager.engine.raw_connection()
+                    try:
+                        cursor = conexion.cursor()
+                        cursor.fast_executemany = True
+                        for inicio in range(0, len(filas), INSERT_BATCH_SIZE):
+                            cursor.executemany(insert_sql, filas[inicio:inicio + INSERT_BATCH_SIZE])
+                        conexion.commit()
+                    except Exception:
+                        conexion.rollback()
+                        raise
+                    finally:
+                        conexion.close()
+                else:
+                    # Otros drivers: un executemany por lote dentro de una única transacción
+                    insert_sql = text(
+                        f"INSERT INTO nv_unified_scoring ({columnas_sql}) "
+                        f"VALUES ({', '.join(':' + col for col in COLUMNAS_INSERT)})"
+                    )
+                    registros = datos.to_dict('records')
+                    with db_manager.engine.begin() as conn:
+                        for inicio in range(0, len(registros), INSERT_BATCH_SIZE):
+                            conn.execute(insert_sql, registros[inicio:inicio + INSERT_BATCH_SIZE])
                 
                 logger.info(f"Resultados guardados en base de datos CP: {len(df_results)} registros")
                 return True
@@ -648,13 +799,20 @@ class UnifiedScoringSystem:
         logger.info("="*60)
         
         try:
-            # 1. Obtener datos CP
-            logger.info("PASO 1: Obteniendo datos CP...")
-            cp_data = self.get_cp_data()
+            # Rutas de ambos orígenes en el orden secuencial (CP primero) para que los
+            # módulos homónimos (p. ej. config) se resuelvan igual desde los hilos
+            for ruta in ('cp_data_analysis_v2/src', 'hdd_data_analysis_v2/src'):
+                if ruta not in sys.path:
+                    sys.path.append(ruta)
             
-            # 2. Obtener datos HDD
+            # 1-2. Obtener datos CP y HDD en paralelo (lecturas de red independientes)
+            logger.info("PASO 1: Obteniendo datos CP...")
             logger.info("PASO 2: Obteniendo datos HDD...")
-            hdd_data = self.get_hdd_data()
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futuro_cp = executor.submit(self.get_cp_data)
+                futuro_hdd = executor.submit(self.get_hdd_data)
+                cp_data = futuro_cp.result()
+                hdd_data = futuro_hdd.result()
             
             # 3. Calcular métricas CP
             logger.info("PASO 3: Calculando métricas CP...")
@@ -728,7 +886,7 @@ def main():
             print(f"Posición {row['posicion_ranking']:2d}: {str(row['equipo']):20s} - "
                   f"{row['puntuacion_final']:5.2f}pts ({row['categoria_final']})")
             print(f"           Área CP: {row['area_cp'] or 'N/A'}, "
-                  f"Unidades HDD: {len(row['unidades_hdd']) if row['unidades_hdd'] else 0}")
+                  f"Unidades HDD: {len(split_unidades_hdd(row['unidades_hdd']))}")
             print(f"           Recomendación: {row['recomendaciones']}")
             print()
         
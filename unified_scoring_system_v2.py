@@ -7,19 +7,175 @@ import numpy as np
 from datetime import datetime, timedelta
 import logging
 import ast
+import math
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    from numba import njit
+except ImportError:
+    # numba es opcional: sin él se usa la versión NumPy de _tasa_cambio
+    njit = None
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cargadores de datos CP y HDD, importados una sola vez al cargar el módulo. Las rutas se
+# agregan en orden (CP primero) para que los módulos homónimos (p. ej. config) se resuelvan
+# siempre igual; si falta un origen se informa aquí y su carga devuelve datos vacíos
+for _ruta in ('cp_data_analysis_v2/src', 'hdd_data_analysis_v2/src'):
+    if _ruta not in sys.path:
+        sys.path.append(_ruta)
+
+try:
+    from cp_upload_data_deploy import upload_data_sql as _cp_upload_data_sql
+except ImportError as e:
+    _cp_upload_data_sql = None
+    logger.error(f"No se pudo importar el cargador de datos CP: {str(e)}")
+
+try:
+    from hdd_upload_data_deploy import upload_data_sql as _hdd_upload_data_sql
+except ImportError as e:
+    _hdd_upload_data_sql = None
+    logger.error(f"No se pudo importar el cargador de datos HDD: {str(e)}")
+
+# Tramos de la puntuación final y su categoría (intervalos [a, b))
+CATEGORIA_BINS = (-np.inf, 25, 50, 75, 90, np.inf)
+CATEGORIA_LABELS = ('Necesita Mejora', 'Regular', 'Bueno', 'Muy Bueno', 'Excelente')
+
+def _tasa_cambio(valores):
+    """
+    Desviación de los cambios porcentuales entre registros consecutivos (x10000).
+    
+    Args:
+        valores: Array float64 ordenado por fecha
+        
+    Returns:
+        float: Tasa de cambio (0 si no hay cambios válidos)
+    """
+    previos = valores[:-1]
+    validos = previos != 0  # Se excluyen los pasos con valor previo 0
+    tasas = (np.diff(valores)[validos] / previos[validos]) * 100
+    return float(np.std(tasas) * 10000) if tasas.size else 0.0
+
+def _estadisticas_bloques_loop(valores, inicios):
+    """
+    Media, desviación (ddof=0) y tasa de cambio de cada bloque en un solo recorrido (para njit).
+    
+    La media es la suma compensada (Kahan) entre n, como la media agrupada de pandas, para que
+    valores iguales den exactamente la misma media; las varianzas se acumulan con Welford,
+    sin la cancelación de s2/n - media².
+    
+    Args:
+        valores: Array float64 con los bloques contiguos, cada uno ordenado por fecha
+        inicios: Posición de inicio de cada bloque, más la posición final
+        
+    Returns:
+        tuple: Arrays (media, desviación, tasa de cambio) por bloque
+    """
+    n_bloques = inicios.shape[0] - 1
+    medias = np.empty(n_bloques)
+    desviaciones = np.empty(n_bloques)
+    tasas = np.empty(n_bloques)
+    for b in range(n_bloques):
+        suma = 0.0
+        compensacion = 0.0
+        media = 0.0
+        m2 = 0.0
+        media_t = 0.0
+        m2_t = 0.0
+        c = 0
+        for i in range(inicios[b], inicios[b + 1]):
+            x = valores[i]
+            k = i - inicios[b] + 1
+            y = x - compensacion
+            t = suma + y
+            compensacion = (t - suma) - y
+            suma = t
+            delta = x - media
+            media += delta / k
+            m2 += delta * (x - media)
+            
+            # Cambio porcentual respecto al registro anterior (se excluye previo 0)
+            if k > 1:
+                previo = valores[i - 1]
+                if previo != 0.0:
+                    r = (x - previo) / previo * 100.0
+                    c += 1
+                    delta_t = r - media_t
+                    media_t += delta_t / c
+                    m2_t += delta_t * (r - media_t)
+        n = inicios[b + 1] - inicios[b]
+        medias[b] = suma / n if n > 0 else np.nan
+        desviaciones[b] = math.sqrt(m2 / n) if n > 0 else np.nan
+        tasas[b] = math.sqrt(m2_t / c) * 10000.0 if c > 0 else 0.0
+    return medias, desviaciones, tasas
+
+# Con numba, un único kernel compilado calcula las tres métricas de todos los grupos;
+# sin él se usan las agregaciones de pandas y _tasa_cambio por grupo
+_estadisticas_bloques = njit(cache=True)(_estadisticas_bloques_loop) if njit is not None else None
+
 class UnifiedScoringSystemV2:
     """
     Sistema de puntuación unificado mejorado con explicaciones por área
     """
     
-    def __init__(self):
-        """Inicializar el sistema de puntuación."""
+    # Umbrales de nivel: < 40 Crítica, < 60 Regular, < 80 Buena, >= 80 Excelente
+    _TIER_UMBRALES = (40, 60, 80)
+    
+    # Plantillas de explicación por métrica, en el orden de los niveles (Crítica ... Excelente)
+    _TIER_TEMPLATES = {
+        'cp_llenado': (
+            "**{area_nombre} Crítica ({score:.1f}pts)**: Con una carga de {valor:.1f} en {area}, el equipo está experimentando problemas significativos de rendimiento que requieren atención inmediata.",
+            "**{area_nombre} Regular ({score:.1f}pts)**: La carga de {valor:.1f} en {area} sugiere que el equipo podría estar experimentando problemas de rendimiento en esta área.",
+            "**{area_nombre} Buena ({score:.1f}pts)**: Con una carga de {valor:.1f} en {area}, el equipo tiene un rendimiento aceptable, aunque hay margen para optimización.",
+            "**{area_nombre} Excelente ({score:.1f}pts)**: El equipo mantiene una carga de {valor:.1f} en {area}, lo que indica un rendimiento excepcional. Esto significa que el sistema está funcionando de manera muy eficiente en esta área.",
+        ),
+        'cp_inestabilidad': (
+            "**Estabilidad en {area_nombre} Crítica ({score:.1f}pts)**: La alta variabilidad de {valor:.1f} indica problemas graves de estabilidad que requieren intervención.",
+            "**Estabilidad en {area_nombre} Regular ({score:.1f}pts)**: La variabilidad de {valor:.1f} sugiere inestabilidad que puede afectar el rendimiento.",
+            "**Estabilidad en {area_nombre} Buena ({score:.1f}pts)**: La variabilidad de {valor:.1f} indica un funcionamiento estable con algunas fluctuaciones menores.",
+            "**Estabilidad en {area_nombre} Excelente ({score:.1f}pts)**: El equipo muestra una variabilidad muy baja ({valor:.1f}), indicando un funcionamiento muy estable.",
+        ),
+        'hdd_uso': (
+            "**Uso HDD Crítico ({score:.1f}pts)**: El uso del {valor:.1f}% indica problemas graves de espacio en disco.",
+            "**Uso HDD Regular ({score:.1f}pts)**: El uso del {valor:.1f}% sugiere que el disco podría estar sobrecargado.",
+            "**Uso HDD Bueno ({score:.1f}pts)**: El uso del {valor:.1f}% es aceptable.",
+            "**Uso HDD Excelente ({score:.1f}pts)**: El disco está siendo utilizado eficientemente al {valor:.1f}%.",
+        ),
+        'hdd_inestabilidad': (
+            "**Estabilidad HDD Crítica ({score:.1f}pts)**: El uso del disco es muy inestable, requiriendo atención inmediata.",
+            "**Estabilidad HDD Regular ({score:.1f}pts)**: El uso del disco muestra variabilidad que puede afectar el rendimiento.",
+            "**Estabilidad HDD Buena ({score:.1f}pts)**: El uso del disco es relativamente estable.",
+            "**Estabilidad HDD Excelente ({score:.1f}pts)**: El uso del disco es muy estable.",
+        ),
+        'hdd_tasa_cambio': (
+            "**Cambios HDD Caóticos ({score:.1f}pts)**: Los cambios en el uso del disco son muy impredecibles.",
+            "**Cambios HDD Variables ({score:.1f}pts)**: Los cambios en el uso del disco son impredecibles.",
+            "**Cambios HDD Estables ({score:.1f}pts)**: Los cambios en el uso del disco son relativamente estables.",
+            "**Cambios HDD Predecibles ({score:.1f}pts)**: Los cambios en el uso del disco son muy predecibles.",
+        ),
+    }
+    
+    # Recomendación para las métricas HDD en nivel Crítica (la tasa de cambio "Caóticos"
+    # nunca generó recomendación y se mantiene así)
+    _RECOMENDACIONES_HDD = {
+        'hdd_uso': "Liberar espacio en disco inmediatamente",
+        'hdd_inestabilidad': "Revisar configuración de disco",
+    }
+    
+    def __init__(self, cache_dir=None):
+        """
+        Inicializar el sistema de puntuación.
+        
+        Args:
+            cache_dir: Carpeta donde guardar en Parquet las métricas CP/HDD del día, para que
+                las siguientes ejecuciones del mismo día no vuelvan a cargarlas (None: sin caché)
+        """
         self.fecha_ejecucion = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.cache_dir = cache_dir
         
         # Configuración de métricas CORREGIDA
         self.metric_configs = {
@@ -76,7 +232,21 @@ class UnifiedScoringSystemV2:
             'MAXMEM': 'Memoria máxima utilizada'
         }
     
-    def calculate_percentile_score(self, value, all_values, direction='lower_better'):
+    @staticmethod
+    def sorted_valid_values(all_values):
+        """
+        Ordena los valores válidos (sin NaN) para reutilizarlos en varios percentiles.
+        
+        Args:
+            all_values: Lista, Series o array de valores
+            
+        Returns:
+            np.ndarray: Valores válidos ordenados (float64)
+        """
+        arr = np.asarray(all_values, dtype=np.float64)
+        return np.sort(arr[~np.isnan(arr)])
+    
+    def calculate_percentile_score(self, value, all_values, direction='lower_better', is_sorted=False):
         """
         Calcula el puntaje basado en percentiles.
         
@@ -84,6 +254,7 @@ class UnifiedScoringSystemV2:
             value: Valor del equipo
             all_values: Lista de todos los valores
             direction: 'lower_better' o 'higher_better'
+            is_sorted: True si all_values ya viene de sorted_valid_values
             
         Returns:
             float: Puntaje de 0 a 100
@@ -91,13 +262,14 @@ class UnifiedScoringSystemV2:
         if pd.isna(value) or len(all_values) == 0:
             return 0.0
         
-        # Filtrar valores válidos
-        valid_values = [v for v in all_values if not pd.isna(v)]
+        # Filtrar valores válidos y ordenarlos (salvo que ya vengan preparados)
+        valid_values = all_values if is_sorted else self.sorted_valid_values(all_values)
         if len(valid_values) == 0:
             return 0.0
         
-        # Calcular percentil
-        percentile = (sum(1 for x in valid_values if x < value) / len(valid_values)) * 100
+        # Calcular percentil: valores estrictamente menores por búsqueda binaria
+        rank = np.searchsorted(valid_values, value, side='left')
+        percentile = (rank / len(valid_values)) * 100
         
         # Invertir para lower_better
         if direction == 'lower_better':
@@ -105,14 +277,147 @@ class UnifiedScoringSystemV2:
         
         return percentile
     
+    def calculate_percentile_scores(self, values, sorted_values, direction='lower_better'):
+        """
+        Calcula en bloque los puntajes por percentiles de varios valores.
+        
+        Args:
+            values: Valores a puntuar
+            sorted_values: Valores válidos ordenados (ver sorted_valid_values)
+            direction: 'lower_better' o 'higher_better'
+            
+        Returns:
+            np.ndarray: Puntajes de 0 a 100 (0 para valores NaN)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if len(sorted_values) == 0:
+            return np.zeros(values.shape)
+        
+        # Un searchsorted para todos los valores
+        percentile = (np.searchsorted(sorted_values, values, side='left') / len(sorted_values)) * 100
+        
+        # Invertir para lower_better
+        if direction == 'lower_better':
+            percentile = 100 - percentile
+        
+        return np.where(np.isnan(values), 0.0, percentile)
+    
+    @staticmethod
+    def _ultimos_7_dias(df):
+        """
+        Filtra los registros de los últimos 7 días respecto a la fecha máxima.
+        
+        Args:
+            df: Registros con 'fecha' ya parseada y sin nulos
+            
+        Returns:
+            pd.DataFrame: Registros dentro de la ventana, en su orden original
+        """
+        fechas = df['fecha']
+        if fechas.is_monotonic_increasing:
+            # Ya ordenado por fecha: la ventana es un corte contiguo (búsqueda binaria)
+            corte = fechas.iloc[-1] - timedelta(days=7)
+            return df.iloc[fechas.searchsorted(corte, side='left'):]
+        return df[fechas >= fechas.max() - timedelta(days=7)]
+    
+    @staticmethod
+    def _group_stats(df, claves, columna):
+        """
+        Media, desviación (ddof=0), tasa de cambio y registros por grupo.
+        
+        Args:
+            df: Registros ya filtrados a los últimos 7 días
+            claves: Columna(s) de agrupación
+            columna: Columna numérica a analizar
+            
+        Returns:
+            pd.DataFrame: Una fila por grupo con al menos 3 registros, en orden de aparición
+        """
+        # Media, desviación y conteo en una sola agrupación; sólo se conservan grupos con >= 3 registros
+        grupos = df.groupby(claves, sort=False, observed=True)[columna]
+        if _estadisticas_bloques is None:
+            stats = grupos.agg(media='mean', registros='size')
+            stats['desviacion'] = grupos.std(ddof=0)
+        else:
+            # Media y desviación las calcula el kernel junto con la tasa de cambio
+            stats = grupos.size().to_frame('registros')
+        stats = stats[stats['registros'] >= 3]
+        
+        # Tasa de cambio sobre los valores ordenados por fecha (mergesort: estable),
+        # sólo para las filas de los grupos conservados
+        df_ordenado = df if df['fecha'].is_monotonic_increasing else df.sort_values('fecha', kind='mergesort')
+        ordenados = df_ordenado.groupby(claves, sort=False, observed=True)[columna]
+        if len(stats) < ordenados.ngroups:
+            df_ordenado = df_ordenado[ordenados.transform('size').to_numpy() >= 3]
+            ordenados = df_ordenado.groupby(claves, sort=False, observed=True)[columna]
+        
+        if _estadisticas_bloques is None:
+            stats['tasa_cambio'] = ordenados.agg(lambda s: _tasa_cambio(s.to_numpy(dtype=np.float64)))
+        else:
+            # Bloques contiguos por grupo (orden estable: cada bloque sigue ordenado por fecha)
+            codigos = ordenados.ngroup().to_numpy()
+            orden = np.argsort(codigos, kind='stable')
+            inicios = np.concatenate(([0], np.cumsum(np.bincount(codigos, minlength=ordenados.ngroups))))
+            medias, desviaciones, tasas = _estadisticas_bloques(
+                df_ordenado[columna].to_numpy(dtype=np.float64)[orden], inicios
+            )
+            stats = stats.join(pd.DataFrame(
+                {'media': medias, 'desviacion': desviaciones, 'tasa_cambio': tasas},
+                index=ordenados.size().index
+            ))
+        
+        return stats[['media', 'desviacion', 'tasa_cambio', 'registros']]
+    
+    def _cache_path(self, nombre):
+        """Ruta del Parquet de caché del día para un resultado intermedio"""
+        return Path(self.cache_dir) / f'{nombre}_{datetime.today():%Y%m%d}.parquet'
+    
+    def _leer_cache(self, nombre):
+        """DataFrame cacheado hoy, o None si la caché está desactivada, no existe o no se puede leer"""
+        if self.cache_dir is None:
+            return None
+        ruta = self._cache_path(nombre)
+        if not ruta.exists():
+            return None
+        try:
+            df = pd.read_parquet(ruta)
+        except Exception as e:
+            logger.warning(f"No se pudo leer la caché {ruta}: {str(e)}")
+            return None
+        logger.info(f"Usando caché {ruta}")
+        return df
+    
+    def _guardar_cache(self, nombre, df):
+        """Guarda el resultado intermedio del día (los fallos sólo se registran)"""
+        if self.cache_dir is None or df.empty:
+            return
+        ruta = self._cache_path(nombre)
+        try:
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            df.to_parquet(ruta, index=False)
+        except Exception as e:
+            logger.warning(f"No se pudo guardar la caché {ruta}: {str(e)}")
+    
     def get_cp_metrics_by_area(self):
         """Obtiene métricas CP por área individual"""
         try:
-            sys.path.append('cp_data_analysis_v2/src')
-            from cp_upload_data_deploy import upload_data_sql
+            cache = self._leer_cache('cp_metrics_by_area')
+            if cache is not None:
+                equipos_por_area = {}
+                for area, equipo, llenado, inestabilidad, tasa_cambio, registros in cache.itertuples(index=False, name=None):
+                    equipos_por_area.setdefault(area, {})[equipo] = {
+                        'llenado': llenado,
+                        'inestabilidad': inestabilidad,
+                        'tasa_cambio': tasa_cambio,
+                        'registros': registros
+                    }
+                return equipos_por_area
+            
+            if _cp_upload_data_sql is None:
+                return {}
             
             logger.info('Cargando datos CP por área...')
-            cp_data = upload_data_sql()
+            cp_data = _cp_upload_data_sql()
             
             equipos_por_area = {}
             
@@ -120,56 +425,43 @@ class UnifiedScoringSystemV2:
                 if df.empty or not set(['equipo','fecha','valor','area']).issubset(df.columns):
                     continue
                 
-                df = df.copy()
-                df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
-                df['valor'] = pd.to_numeric(df['valor'], errors='coerce')
-                df = df.dropna(subset=['fecha','valor'])
+                # Sólo las columnas necesarias, parseadas sin copiar el DataFrame completo
+                df = df.loc[:, ['equipo','fecha','valor','area']].assign(
+                    fecha=pd.to_datetime(df['fecha'], errors='coerce', cache=True),
+                    valor=pd.to_numeric(df['valor'], errors='coerce')
+                ).dropna(subset=['fecha','valor'])
                 
                 if df.empty:
                     continue
                 
-                fecha_max = df['fecha'].max()
-                df = df[df['fecha'] >= fecha_max - timedelta(days=7)]
+                df = self._ultimos_7_dias(df)
                 
                 if df.empty:
                     continue
                 
-                # Procesar por área individual
+                # Claves como categorías: las agrupaciones trabajan sobre códigos enteros
+                df = df.assign(area=df['area'].astype('category'), equipo=df['equipo'].astype('category'))
+                
+                # Procesar por área individual (todas las áreas del DataFrame quedan registradas)
                 for area in df['area'].unique():
-                    df_area = df[df['area'] == area]
-                    
-                    if area not in equipos_por_area:
-                        equipos_por_area[area] = {}
-                    
-                    for equipo in df_area['equipo'].unique():
-                        df_equipo = df_area[df_area['equipo'] == equipo]
-                        
-                        if len(df_equipo) < 3:
-                            continue
-                        
-                        valores = df_equipo['valor'].tolist()
-                        
-                        # Calcular métricas por área
-                        llenado = np.mean(valores)
-                        inestabilidad = np.std(valores) * 1000
-                        
-                        # Tasa de cambio
-                        df_equipo_sorted = df_equipo.sort_values('fecha')
-                        tasas = []
-                        for i in range(1, len(df_equipo_sorted)):
-                            v0 = df_equipo_sorted.iloc[i-1]['valor']
-                            v1 = df_equipo_sorted.iloc[i]['valor']
-                            if v0 != 0:
-                                tasas.append(((v1-v0)/v0)*100)
-                        
-                        tasa_cambio = np.std(tasas) * 10000 if tasas else 0
-                        
-                        equipos_por_area[area][equipo] = {
-                            'llenado': llenado,
-                            'inestabilidad': inestabilidad,
-                            'tasa_cambio': tasa_cambio,
-                            'registros': len(df_equipo)
-                        }
+                    equipos_por_area.setdefault(area, {})
+                
+                # Métricas por (área, equipo) en una sola agrupación
+                stats = self._group_stats(df, ['area', 'equipo'], 'valor')
+                
+                for (area, equipo), llenado, inestabilidad, tasa_cambio, registros in stats.itertuples(name=None):
+                    equipos_por_area[area][equipo] = {
+                        'llenado': llenado,
+                        'inestabilidad': inestabilidad * 1000,
+                        'tasa_cambio': tasa_cambio,
+                        'registros': registros
+                    }
+            
+            self._guardar_cache('cp_metrics_by_area', pd.DataFrame.from_records(
+                [(area, equipo, *metricas.values()) for area, equipos in equipos_por_area.items()
+                 for equipo, metricas in equipos.items()],
+                columns=['area', 'equipo', 'llenado', 'inestabilidad', 'tasa_cambio', 'registros']
+            ))
             
             return equipos_por_area
             
@@ -180,149 +472,240 @@ class UnifiedScoringSystemV2:
     def get_hdd_metrics(self):
         """Obtiene métricas HDD"""
         try:
-            sys.path.append('hdd_data_analysis_v2/src')
-            from hdd_upload_data_deploy import upload_data_sql
+            cache = self._leer_cache('hdd_metrics')
+            if cache is not None:
+                # Parquet devuelve las listas como arrays
+                return cache.assign(unidades_hdd=cache['unidades_hdd'].map(list))
+            
+            if _hdd_upload_data_sql is None:
+                return pd.DataFrame()
             
             logger.info('Cargando datos HDD...')
-            hdd_data = upload_data_sql()
+            hdd_data = _hdd_upload_data_sql()
             equipos = {}
             
             for nombre_df, df in hdd_data.items():
                 if df.empty or not set(['equipo','fecha','uso','unidad']).issubset(df.columns):
                     continue
                 
-                df = df.copy()
-                df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
-                df['uso'] = pd.to_numeric(df['uso'], errors='coerce')
-                df = df.dropna(subset=['fecha','uso'])
+                # Sólo las columnas necesarias, parseadas sin copiar el DataFrame completo
+                df = df.loc[:, ['equipo','fecha','uso','unidad']].assign(
+                    fecha=pd.to_datetime(df['fecha'], errors='coerce', cache=True),
+                    uso=pd.to_numeric(df['uso'], errors='coerce')
+                ).dropna(subset=['fecha','uso'])
                 
                 if df.empty:
                     continue
                 
-                fecha_max = df['fecha'].max()
-                df = df[df['fecha'] >= fecha_max - timedelta(days=7)]
+                df = self._ultimos_7_dias(df)
                 
                 if df.empty:
                     continue
                 
-                for equipo in df['equipo'].unique():
-                    df_eq = df[df['equipo']==equipo]
-                    if len(df_eq) < 3:
-                        continue
-                    
+                # Clave como categoría: las agrupaciones trabajan sobre códigos enteros
+                df = df.assign(equipo=df['equipo'].astype('category'))
+                
+                # Métricas por equipo en una sola agrupación
+                stats = self._group_stats(df, 'equipo', 'uso')
+                unidades = df.groupby('equipo', sort=False, observed=True)['unidad'].first()
+                
+                for equipo, uso, inestabilidad, tasa_cambio, registros in stats.itertuples(name=None):
                     if equipo not in equipos:
-                        equipos[equipo] = {'uso':[],'inestabilidad':[],'tasa_cambio':[],'unidades':set(),'registros':0}
+                        equipos[equipo] = {'uso_sum':0.0,'inest_sum':0.0,'tc_sum':0.0,'n':0,'unidades':set(),'registros':0}
                     
-                    valores = df_eq['uso'].tolist()
-                    equipos[equipo]['uso'].append(np.mean(valores)*100)
-                    equipos[equipo]['inestabilidad'].append(np.std(valores)*1000)
-                    
-                    # Tasa de cambio
-                    df_eq_sorted = df_eq.sort_values('fecha')
-                    tasas = []
-                    for i in range(1,len(df_eq_sorted)):
-                        v0 = df_eq_sorted.iloc[i-1]['uso']
-                        v1 = df_eq_sorted.iloc[i]['uso']
-                        if v0 != 0:
-                            tasas.append(((v1-v0)/v0)*100)
-                    
-                    equipos[equipo]['tasa_cambio'].append(np.std(tasas)*10000 if tasas else 0)
-                    equipos[equipo]['unidades'].add(df_eq['unidad'].iloc[0])
-                    equipos[equipo]['registros'] += len(df_eq)
+                    # Sumas acumuladas: el promedio se obtiene al consolidar
+                    acumulado = equipos[equipo]
+                    acumulado['uso_sum'] += uso*100
+                    acumulado['inest_sum'] += inestabilidad*1000
+                    acumulado['tc_sum'] += tasa_cambio
+                    acumulado['n'] += 1
+                    acumulado['unidades'].add(unidades[equipo])
+                    acumulado['registros'] += registros
             
             # Consolidar métricas promedio por equipo
             rows = []
             for eq, vals in equipos.items():
+                n = vals['n']
                 rows.append({
                     'equipo': eq,
-                    'hdd_uso': np.mean(vals['uso']) if vals['uso'] else np.nan,
-                    'hdd_inestabilidad': np.mean(vals['inestabilidad']) if vals['inestabilidad'] else np.nan,
-                    'hdd_tasa_cambio': np.mean(vals['tasa_cambio']) if vals['tasa_cambio'] else np.nan,
+                    'hdd_uso': vals['uso_sum'] / n if n else np.nan,
+                    'hdd_inestabilidad': vals['inest_sum'] / n if n else np.nan,
+                    'hdd_tasa_cambio': vals['tc_sum'] / n if n else np.nan,
                     'unidades_hdd': list(vals['unidades']),
                     'registros_hdd': vals['registros']
                 })
             
-            return pd.DataFrame(rows)
+            hdd_metrics = pd.DataFrame(rows)
+            self._guardar_cache('hdd_metrics', hdd_metrics)
+            
+            return hdd_metrics
             
         except Exception as e:
             logger.error(f"Error cargando datos HDD: {str(e)}")
             return pd.DataFrame()
     
-    def generate_area_specific_explanation(self, equipo, area, metricas_area, all_equipos_area):
-        """Genera explicación específica por área"""
-        explicacion = []
+    def generate_area_specific_explanation(self, area, equipo_data, llenado_score, inestabilidad_score):
+        """
+        Genera explicación específica por área.
         
-        # Obtener valores del equipo para esta área
-        if equipo in metricas_area:
-            equipo_data = metricas_area[equipo]
+        Args:
+            area: Área CP
+            equipo_data: Métricas del equipo en el área (llenado, inestabilidad, ...)
+            llenado_score: Puntaje de llenado ya calculado
+            inestabilidad_score: Puntaje de inestabilidad ya calculado
             
+        Returns:
+            list: Explicaciones de llenado e inestabilidad
+        """
+        explicacion = []
+        
+        if equipo_data:
             # Llenado
             llenado_valor = equipo_data['llenado']
-            llenado_score = self.calculate_percentile_score(
-                llenado_valor, 
-                [eq['llenado'] for eq in metricas_area.values()], 
-                'lower_better'
-            )
             
             area_nombre = self.areas_cp_significado.get(area, area)
             
-            if llenado_score >= 80:
-                explicacion.append(f"**{area_nombre} Excelente ({llenado_score:.1f}pts)**: El equipo mantiene una carga de {llenado_valor:.1f} en {area}, lo que indica un rendimiento excepcional. Esto significa que el sistema está funcionando de manera muy eficiente en esta área.")
-            elif llenado_score >= 60:
-                explicacion.append(f"**{area_nombre} Buena ({llenado_score:.1f}pts)**: Con una carga de {llenado_valor:.1f} en {area}, el equipo tiene un rendimiento aceptable, aunque hay margen para optimización.")
-            elif llenado_score >= 40:
-                explicacion.append(f"**{area_nombre} Regular ({llenado_score:.1f}pts)**: La carga de {llenado_valor:.1f} en {area} sugiere que el equipo podría estar experimentando problemas de rendimiento en esta área.")
-            else:
-                explicacion.append(f"**{area_nombre} Crítica ({llenado_score:.1f}pts)**: Con una carga de {llenado_valor:.1f} en {area}, el equipo está experimentando problemas significativos de rendimiento que requieren atención inmediata.")
+            explicacion.append(self._tier('cp_llenado', llenado_score).format_map({
+                'area_nombre': area_nombre, 'area': area, 'score': llenado_score, 'valor': llenado_valor
+            }))
             
             # Inestabilidad
             inestabilidad_valor = equipo_data['inestabilidad']
-            inestabilidad_score = self.calculate_percentile_score(
-                inestabilidad_valor,
-                [eq['inestabilidad'] for eq in metricas_area.values()],
-                'lower_better'
-            )
-            
-            if inestabilidad_score >= 80:
-                explicacion.append(f"**Estabilidad en {area_nombre} Excelente ({inestabilidad_score:.1f}pts)**: El equipo muestra una variabilidad muy baja ({inestabilidad_valor:.1f}), indicando un funcionamiento muy estable.")
-            elif inestabilidad_score >= 60:
-                explicacion.append(f"**Estabilidad en {area_nombre} Buena ({inestabilidad_score:.1f}pts)**: La variabilidad de {inestabilidad_valor:.1f} indica un funcionamiento estable con algunas fluctuaciones menores.")
-            elif inestabilidad_score >= 40:
-                explicacion.append(f"**Estabilidad en {area_nombre} Regular ({inestabilidad_score:.1f}pts)**: La variabilidad de {inestabilidad_valor:.1f} sugiere inestabilidad que puede afectar el rendimiento.")
-            else:
-                explicacion.append(f"**Estabilidad en {area_nombre} Crítica ({inestabilidad_score:.1f}pts)**: La alta variabilidad de {inestabilidad_valor:.1f} indica problemas graves de estabilidad que requieren intervención.")
+            explicacion.append(self._tier('cp_inestabilidad', inestabilidad_score).format_map({
+                'area_nombre': area_nombre, 'score': inestabilidad_score, 'valor': inestabilidad_valor
+            }))
         
         return explicacion
     
-    def calculate_unified_score(self):
-        """Calcula la puntuación unificada con explicaciones por área"""
+    def _nivel(self, score):
+        """Nivel del puntaje: 0 Crítica, 1 Regular, 2 Buena, 3 Excelente"""
+        return bisect_right(self._TIER_UMBRALES, score)
+    
+    def _tier(self, metrica, score):
+        """Plantilla de explicación de la métrica para el nivel que corresponde al puntaje"""
+        return self._TIER_TEMPLATES[metrica][self._nivel(score)]
+    
+    def score_area_arrays(self, metricas_area):
+        """Puntajes lower_better de un área por métrica, un searchsorted por métrica (orden de metricas_area)"""
+        por_metrica = {}
+        for metrica in ('llenado', 'inestabilidad', 'tasa_cambio'):
+            valores = np.fromiter(
+                (eq[metrica] for eq in metricas_area.values()), dtype=np.float64, count=len(metricas_area)
+            )
+            por_metrica[metrica] = self.calculate_percentile_scores(
+                valores, self.sorted_valid_values(valores), 'lower_better'
+            )
+        return por_metrica
+    
+    def score_area(self, metricas_area, por_metrica=None):
+        """Puntajes lower_better de cada equipo de un área (por_metrica: resultado de score_area_arrays)"""
+        if por_metrica is None:
+            por_metrica = self.score_area_arrays(metricas_area)
+        return {
+            equipo: {metrica: puntajes[i] for metrica, puntajes in por_metrica.items()}
+            for i, equipo in enumerate(metricas_area)
+        }
+    
+    def calculate_unified_score(self, top_k_explicaciones=None):
+        """
+        Calcula la puntuación unificada con explicaciones por área.
+        
+        Args:
+            top_k_explicaciones: Si se indica, sólo los K equipos mejor puntuados reciben
+                explicación detallada (el resto queda vacía); por defecto, todos
+                
+        Returns:
+            pd.DataFrame: Ranking de equipos ordenado por puntuación final
+        """
         logger.info("Iniciando cálculo de puntuación unificada...")
         
-        # Cargar datos
-        cp_metrics_by_area = self.get_cp_metrics_by_area()
-        hdd_metrics = self.get_hdd_metrics()
+        # Cargar datos CP y HDD en paralelo (cargas independientes)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futuro_cp = executor.submit(self.get_cp_metrics_by_area)
+            futuro_hdd = executor.submit(self.get_hdd_metrics)
+            cp_metrics_by_area = futuro_cp.result()
+            hdd_metrics = futuro_hdd.result()
         
         if not cp_metrics_by_area and hdd_metrics.empty:
             logger.error("No se pudieron cargar datos de CP ni HDD")
             return pd.DataFrame()
         
-        # Obtener todos los equipos únicos
-        todos_equipos = set()
-        
-        # Equipos CP
-        for area, equipos in cp_metrics_by_area.items():
-            todos_equipos.update(equipos.keys())
-        
-        # Equipos HDD
+        # Puntajes de todos los equipos calculados en bloque: por área/métrica en CP
+        # y por métrica en HDD
+        por_metrica_cp = {area: self.score_area_arrays(equipos) for area, equipos in cp_metrics_by_area.items()}
+        puntajes_cp = {
+            area: self.score_area(equipos, por_metrica_cp[area]) for area, equipos in cp_metrics_by_area.items()
+        }
+        hdd_lookup = {}
+        puntajes_hdd = {}
         if not hdd_metrics.empty:
-            todos_equipos.update(hdd_metrics['equipo'].tolist())
+            for col in ('hdd_uso', 'hdd_inestabilidad', 'hdd_tasa_cambio'):
+                valores = hdd_metrics[col].to_numpy(dtype=np.float64)
+                puntajes_hdd[f'{col}_score'] = self.calculate_percentile_scores(
+                    valores, self.sorted_valid_values(valores), 'lower_better'
+                )
+            # Métricas y puntajes HDD por equipo (búsqueda O(1) en el bucle)
+            hdd_lookup = hdd_metrics.assign(**puntajes_hdd).set_index('equipo').to_dict(orient='index')
+        
+        # Obtener todos los equipos únicos (orden fijo: los empates se resuelven igual en cada ejecución)
+        todos_equipos = sorted(set().union(*(e.keys() for e in cp_metrics_by_area.values()), hdd_lookup.keys()))
         
         logger.info(f"Total equipos encontrados: {len(todos_equipos)}")
         
-        # Calcular puntuaciones
+        # Puntuación final de todos los equipos en bloque: promedio de las áreas CP (45%) y
+        # puntaje HDD (55%), normalizado por el peso de las fuentes con datos
+        n_equipos = len(todos_equipos)
+        posicion = {equipo: i for i, equipo in enumerate(todos_equipos)}
+        
+        cp_matrix = np.full((n_equipos, len(cp_metrics_by_area)), np.nan)
+        for j, (area, equipos_area) in enumerate(cp_metrics_by_area.items()):
+            m = por_metrica_cp[area]
+            cp_matrix[[posicion[e] for e in equipos_area], j] = (
+                m['llenado'] * 0.4 + m['inestabilidad'] * 0.3 + m['tasa_cambio'] * 0.3
+            )
+        
+        hdd_vec = np.full(n_equipos, np.nan)
+        if hdd_lookup:
+            hdd_vec[[posicion[e] for e in hdd_lookup]] = (
+                puntajes_hdd['hdd_uso_score'] * 0.4
+                + puntajes_hdd['hdd_inestabilidad_score'] * 0.4
+                + puntajes_hdd['hdd_tasa_cambio_score'] * 0.2
+            )
+        
+        areas_validas = ~np.isnan(cp_matrix)
+        n_areas = areas_validas.sum(axis=1)
+        tiene_hdd = ~np.isnan(hdd_vec)
+        cp_promedio = np.divide(
+            np.where(areas_validas, cp_matrix, 0.0).sum(axis=1), n_areas,
+            out=np.zeros(n_equipos), where=n_areas > 0
+        )
+        peso_cp = np.where(n_areas > 0, 0.45, 0.0)
+        peso_hdd = np.where(tiene_hdd, 0.55, 0.0)
+        total_peso = peso_cp + peso_hdd
+        puntuaciones_finales = np.divide(
+            cp_promedio * peso_cp + np.where(tiene_hdd, hdd_vec, 0.0) * peso_hdd, total_peso,
+            out=np.zeros(n_equipos), where=total_peso > 0
+        )
+        
+        # Categorizar todas las puntuaciones en una sola pasada
+        categorias = np.asarray(
+            pd.cut(puntuaciones_finales, bins=CATEGORIA_BINS, labels=CATEGORIA_LABELS, right=False),
+            dtype=object
+        )
+        
+        # Equipos que reciben explicación detallada (los K primeros del ranking, o todos)
+        if top_k_explicaciones is None:
+            con_explicacion = np.ones(n_equipos, dtype=bool)
+        else:
+            con_explicacion = np.zeros(n_equipos, dtype=bool)
+            con_explicacion[np.argsort(-puntuaciones_finales, kind='stable')[:top_k_explicaciones]] = True
+        
+        # Explicaciones y recomendaciones por equipo
         resultados = []
         
-        for equipo in todos_equipos:
+        for equipo, puntuacion_final, categoria, explicar in zip(
+            todos_equipos, puntuaciones_finales, categorias, con_explicacion
+        ):
             logger.info(f"Procesando equipo: {equipo}")
             
             # Inicializar métricas
@@ -336,124 +719,61 @@ class UnifiedScoringSystemV2:
             }
             
             # Procesar métricas CP por área
-            puntuaciones_cp = []
             explicaciones_cp = []
+            cp_signals = []
             
             for area, equipos_area in cp_metrics_by_area.items():
                 if equipo in equipos_area:
                     metricas_equipo['areas_cp'].append(area)
                     metricas_equipo['registros_cp'] += equipos_area[equipo]['registros']
                     
-                    # Generar explicación específica por área
-                    explicacion_area = self.generate_area_specific_explanation(
-                        equipo, area, equipos_area, equipos_area
-                    )
-                    explicaciones_cp.extend(explicacion_area)
-                    
-                    # Calcular puntuaciones por área
-                    llenado = equipos_area[equipo]['llenado']
-                    inestabilidad = equipos_area[equipo]['inestabilidad']
-                    tasa_cambio = equipos_area[equipo]['tasa_cambio']
-                    
-                    # Obtener todos los valores para calcular percentiles
-                    todos_llenado = [eq['llenado'] for eq in equipos_area.values()]
-                    todos_inestabilidad = [eq['inestabilidad'] for eq in equipos_area.values()]
-                    todos_tasa_cambio = [eq['tasa_cambio'] for eq in equipos_area.values()]
-                    
-                    # Calcular puntuaciones
-                    llenado_score = self.calculate_percentile_score(llenado, todos_llenado, 'lower_better')
-                    inestabilidad_score = self.calculate_percentile_score(inestabilidad, todos_inestabilidad, 'lower_better')
-                    tasa_cambio_score = self.calculate_percentile_score(tasa_cambio, todos_tasa_cambio, 'lower_better')
+                    # Puntuaciones por área (ya calculadas en bloque)
+                    puntajes = puntajes_cp[area][equipo]
+                    llenado_score = puntajes['llenado']
+                    inestabilidad_score = puntajes['inestabilidad']
                     
-                    # Puntuación promedio por área
-                    area_score = (llenado_score * 0.4 + inestabilidad_score * 0.3 + tasa_cambio_score * 0.3)
-                    puntuaciones_cp.append(area_score)
+                    # Generar explicación específica por área con los mismos puntajes
+                    if explicar:
+                        explicaciones_cp.extend(self.generate_area_specific_explanation(
+                            area, equipos_area[equipo], llenado_score, inestabilidad_score
+                        ))
+                    cp_signals.append((area, 'llenado', llenado_score))
+                    cp_signals.append((area, 'inestabilidad', inestabilidad_score))
             
             # Procesar métricas HDD
-            puntuaciones_hdd = []
             explicaciones_hdd = []
+            hdd_signals = []
             
-            if not hdd_metrics.empty:
-                hdd_equipo = hdd_metrics[hdd_metrics['equipo'] == equipo]
-                if not hdd_equipo.empty:
-                    row = hdd_equipo.iloc[0]
-                    metricas_equipo['unidades_hdd'] = row['unidades_hdd']
-                    metricas_equipo['registros_hdd'] = row['registros_hdd']
-                    
-                    # Calcular puntuaciones HDD
-                    hdd_uso = row['hdd_uso']
-                    hdd_inestabilidad = row['hdd_inestabilidad']
-                    hdd_tasa_cambio = row['hdd_tasa_cambio']
-                    
-                    if not pd.isna(hdd_uso):
-                        hdd_uso_score = self.calculate_percentile_score(hdd_uso, hdd_metrics['hdd_uso'].dropna(), 'lower_better')
-                        if hdd_uso_score >= 80:
-                            explicaciones_hdd.append(f"**Uso HDD Excelente ({hdd_uso_score:.1f}pts)**: El disco está siendo utilizado eficientemente al {hdd_uso:.1f}%.")
-                        elif hdd_uso_score >= 60:
-                            explicaciones_hdd.append(f"**Uso HDD Bueno ({hdd_uso_score:.1f}pts)**: El uso del {hdd_uso:.1f}% es aceptable.")
-                        elif hdd_uso_score >= 40:
-                            explicaciones_hdd.append(f"**Uso HDD Regular ({hdd_uso_score:.1f}pts)**: El uso del {hdd_uso:.1f}% sugiere que el disco podría estar sobrecargado.")
-                        else:
-                            explicaciones_hdd.append(f"**Uso HDD Crítico ({hdd_uso_score:.1f}pts)**: El uso del {hdd_uso:.1f}% indica problemas graves de espacio en disco.")
-                    
-                    if not pd.isna(hdd_inestabilidad):
-                        hdd_inestabilidad_score = self.calculate_percentile_score(hdd_inestabilidad, hdd_metrics['hdd_inestabilidad'].dropna(), 'lower_better')
-                        if hdd_inestabilidad_score >= 80:
-                            explicaciones_hdd.append(f"**Estabilidad HDD Excelente ({hdd_inestabilidad_score:.1f}pts)**: El uso del disco es muy estable.")
-                        elif hdd_inestabilidad_score >= 60:
-                            explicaciones_hdd.append(f"**Estabilidad HDD Buena ({hdd_inestabilidad_score:.1f}pts)**: El uso del disco es relativamente estable.")
-                        elif hdd_inestabilidad_score >= 40:
-                            explicaciones_hdd.append(f"**Estabilidad HDD Regular ({hdd_inestabilidad_score:.1f}pts)**: El uso del disco muestra variabilidad que puede afectar el rendimiento.")
-                        else:
-                            explicaciones_hdd.append(f"**Estabilidad HDD Crítica ({hdd_inestabilidad_score:.1f}pts)**: El uso del disco es muy inestable, requiriendo atención inmediata.")
-                    
-                    if not pd.isna(hdd_tasa_cambio):
-                        hdd_tasa_cambio_score = self.calculate_percentile_score(hdd_tasa_cambio, hdd_metrics['hdd_tasa_cambio'].dropna(), 'lower_better')
-                        if hdd_tasa_cambio_score >= 80:
-                            explicaciones_hdd.append(f"**Cambios HDD Predecibles ({hdd_tasa_cambio_score:.1f}pts)**: Los cambios en el uso del disco son muy predecibles.")
-                        elif hdd_tasa_cambio_score >= 60:
-                            explicaciones_hdd.append(f"**Cambios HDD Estables ({hdd_tasa_cambio_score:.1f}pts)**: Los cambios en el uso del disco son relativamente estables.")
-                        elif hdd_tasa_cambio_score >= 40:
-                            explicaciones_hdd.append(f"**Cambios HDD Variables ({hdd_tasa_cambio_score:.1f}pts)**: Los cambios en el uso del disco son impredecibles.")
-                        else:
-                            explicaciones_hdd.append(f"**Cambios HDD Caóticos ({hdd_tasa_cambio_score:.1f}pts)**: Los cambios en el uso del disco son muy impredecibles.")
-                    
-                    # Puntuación HDD
-                    hdd_score = (hdd_uso_score * 0.4 + hdd_inestabilidad_score * 0.4 + hdd_tasa_cambio_score * 0.2)
-                    puntuaciones_hdd.append(hdd_score)
-            
-            # Calcular puntuación final
-            puntuacion_final = 0
-            total_peso = 0
-            
-            if puntuaciones_cp:
-                cp_promedio = np.mean(puntuaciones_cp)
-                puntuacion_final += cp_promedio * 0.45  # 45% para CP
-                total_peso += 0.45
-            
-            if puntuaciones_hdd:
-                hdd_promedio = np.mean(puntuaciones_hdd)
-                puntuacion_final += hdd_promedio * 0.55  # 55% para HDD
-                total_peso += 0.55
-            
-            # Normalizar si es necesario
-            if total_peso > 0:
-                puntuacion_final = puntuacion_final / total_peso
-            
-            # Categorizar
-            if puntuacion_final >= 90:
-                categoria = "Excelente"
-            elif puntuacion_final >= 75:
-                categoria = "Muy Bueno"
-            elif puntuacion_final >= 50:
-                categoria = "Bueno"
-            elif puntuacion_final >= 25:
-                categoria = "Regular"
-            else:
-                categoria = "Necesita Mejora"
+            row = hdd_lookup.get(equipo)
+            if row is not None:
+                metricas_equipo['unidades_hdd'] = row['unidades_hdd']
+                metricas_equipo['registros_hdd'] = row['registros_hdd']
+                
+                # Calcular puntuaciones HDD
+                hdd_uso = row['hdd_uso']
+                hdd_inestabilidad = row['hdd_inestabilidad']
+                hdd_tasa_cambio = row['hdd_tasa_cambio']
+                
+                if not pd.isna(hdd_uso):
+                    hdd_uso_score = row['hdd_uso_score']
+                    hdd_signals.append(('hdd_uso', hdd_uso_score))
+                    if explicar:
+                        explicaciones_hdd.append(self._tier('hdd_uso', hdd_uso_score).format_map({'score': hdd_uso_score, 'valor': hdd_uso}))
+                
+                if not pd.isna(hdd_inestabilidad):
+                    hdd_inestabilidad_score = row['hdd_inestabilidad_score']
+                    hdd_signals.append(('hdd_inestabilidad', hdd_inestabilidad_score))
+                    if explicar:
+                        explicaciones_hdd.append(self._tier('hdd_inestabilidad', hdd_inestabilidad_score).format_map({'score': hdd_inestabilidad_score}))
+                
+                if not pd.isna(hdd_tasa_cambio):
+                    hdd_tasa_cambio_score = row['hdd_tasa_cambio_score']
+                    hdd_signals.append(('hdd_tasa_cambio', hdd_tasa_cambio_score))
+                    if explicar:
+                        explicaciones_hdd.append(self._tier('hdd_tasa_cambio', hdd_tasa_cambio_score).format_map({'score': hdd_tasa_cambio_score}))
             
             # Generar recomendaciones
-            recomendaciones = self.generate_recommendations(puntuacion_final, explicaciones_cp, explicaciones_hdd)
+            recomendaciones = self.generate_recommendations(puntuacion_final, cp_signals, hdd_signals)
             
             # Consolidar resultados
             metricas_equipo.update({
@@ -469,36 +789,43 @@ class UnifiedScoringSystemV2:
         # Crear DataFrame y ordenar por puntuación
         df_resultados = pd.DataFrame(resultados)
         if not df_resultados.empty:
-            df_resultados = df_resultados.sort_values('puntuacion_final', ascending=False)
+            df_resultados = df_resultados.sort_values('puntuacion_final', ascending=False, kind='stable')
             df_resultados['posicion_ranking'] = range(1, len(df_resultados) + 1)
         
         return df_resultados
     
-    def generate_recommendations(self, puntuacion_final, explicaciones_cp, explicaciones_hdd):
-        """Genera recomendaciones basadas en las explicaciones"""
+    def generate_recommendations(self, puntuacion_final, cp_signals, hdd_signals):
+        """
+        Genera recomendaciones a partir de los puntajes de cada métrica.
+        
+        Args:
+            puntuacion_final: Puntuación final del equipo
+            cp_signals: Tuplas (area, metrica, puntaje) de las métricas CP explicadas
+            hdd_signals: Tuplas (metrica, puntaje) de las métricas HDD explicadas
+            
+        Returns:
+            str: Recomendaciones separadas por '; '
+        """
         recomendaciones = []
         
         if puntuacion_final < 50:
             recomendaciones.append("Revisión completa del equipo requerida")
         
-        # Analizar explicaciones CP
-        for explicacion in explicaciones_cp:
-            if "Crítica" in explicacion:
-                area = explicacion.split()[1]
+        # Métricas CP en nivel Crítica o Regular
+        for area, metrica, score in cp_signals:
+            nivel = self._nivel(score)
+            if nivel == 0:
                 recomendaciones.append(f"Intervención inmediata en {area}")
-            elif "Regular" in explicacion:
-                area = explicacion.split()[1]
+            elif nivel == 1:
                 recomendaciones.append(f"Optimizar rendimiento en {area}")
         
-        # Analizar explicaciones HDD
-        for explicacion in explicaciones_hdd:
-            if "Crítico" in explicacion or "Crítica" in explicacion:
-                if "Uso HDD" in explicacion:
-                    recomendaciones.append("Liberar espacio en disco inmediatamente")
-                elif "Estabilidad HDD" in explicacion:
-                    recomendaciones.append("Revisar configuración de disco")
-                elif "Cambios HDD" in explicacion:
-                    recomendaciones.append("Analizar patrones de uso de disco")
+        # Métricas HDD en nivel Crítica
+        for metrica, score in hdd_signals:
+            if self._nivel(score) == 0 and metrica in self._RECOMENDACIONES_HDD:
+                recomendaciones.append(self._RECOMENDACIONES_HDD[metrica])
+        
+        # Sin duplicados (p. ej. llenado e inestabilidad críticos en la misma área), en orden
+        recomendaciones = list(dict.fromkeys(recomendaciones))
         
         if not recomendaciones:
             if puntuacion_final >= 80: